@@ -10,6 +10,34 @@ class Settings(BaseSettings):
     aistudio_api_key: str = ''
     sqlite_path: str = 'db/moe_router.sqlite'
     request_timeout_seconds: int = 30
+    admin_token: str = ''
+    tenant_rate_limit_enabled: bool = False
+    # API key -> tenant id. Unknown keys and anonymous callers share the 'anonymous' tenant.
+    tenant_api_keys: dict[str, str] = {}
+    # Only enable behind a gateway that sets X-Tenant-Id itself; clients could rotate it.
+    trust_tenant_header: bool = False
+    tenant_requests_per_second: float = 5.0
+    tenant_request_burst: float = 20.0
+    tenant_usd_per_minute: float = 0.25
+    tenant_max_tracked: int = 200_000
+    tenant_idle_seconds: float = 300.0
+    semantic_routing_enabled: bool = False
+    semantic_index_path: str = 'db/semantic_index'
+    response_cache_enabled: bool = False
+    response_cache_capacity: int = 4096
+    response_cache_thresholds: dict[str, float] = {'openai': 0.96, 'gemini_pro': 0.975}
+    prompt_compaction_enabled: bool = False
+    prompt_compaction_min_importance: float = 0.7
+    prompt_compaction_budgets: dict[str, int] = {'free': 1024, 'pro': 2048, 'enterprise': 4096}
+    provider_batching_enabled: bool = False
+    provider_batch_window_ms: float = 5.0
+    provider_batch_max_size: int = 16
+    circuit_breaker_enabled: bool = True
+    circuit_breaker_window: int = 20
+    circuit_breaker_min_calls: int = 5
+    circuit_breaker_failure_rate: float = 0.5
+    circuit_breaker_open_seconds: float = 30.0
+    circuit_breaker_probe_interval_seconds: float = 5.0
 
     model_config = SettingsConfigDict(env_file='.env')
 
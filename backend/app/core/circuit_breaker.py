@@ -0,0 +1,230 @@
+'''Per provider/model circuit breakers driven by rolling error and timeout rates.'''
+
+from __future__ import annotations
+
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Deque, Literal
+
+BreakerState = Literal['closed', 'open', 'half_open']
+
+
+@dataclass(frozen=True, slots=True)
+class BreakerConfig:
+    window_size: int = 20
+    min_calls: int = 5
+    failure_rate_threshold: float = 0.5
+    open_seconds: float = 30.0
+    probe_interval_seconds: float = 5.0
+    max_concurrent_probes: int = 1
+
+
+@dataclass(frozen=True, slots=True)
+class BreakerTicket:
+    '''Admission of one call; only probe tickets may move a half-open breaker.'''
+
+    provider: str
+    model: str
+    probe: bool = False
+    # Open/half-open episode the probe belongs to; late probes from older episodes are ignored.
+    epoch: int = 0
+
+
+class CircuitBreaker:
+    '''Closed -> open when the rolling failure rate is too high; half-open probes close it again.'''
+
+    def __init__(self, config: BreakerConfig, clock: Callable[[], float]) -> None:
+        self.config = config
+        self.state: BreakerState = 'closed'
+        self._clock = clock
+        # True for a failure (error or timeout), False for a success.
+        self._outcomes: Deque[bool] = deque(maxlen=config.window_size)
+        self.timeouts = 0
+        self.errors = 0
+        self._opened_at = 0.0
+        self._last_probe_at = float('-inf')
+        self._probes_in_flight = 0
+        self._epoch = 0
+
+    def is_available(self) -> bool:
+        '''Whether a call could be admitted right now, without reserving it.'''
+        if self.state == 'closed':
+            return True
+        now = self._clock()
+        if self.state == 'open' and now - self._opened_at < self.config.open_seconds:
+            return False
+        return (
+            self._probes_in_flight < self.config.max_concurrent_probes
+            and now - self._last_probe_at >= self.config.probe_interval_seconds
+        )
+
+    def acquire(self) -> tuple[bool, bool, BreakerState | None]:
+        '''Admit a call; returns (admitted, is probe, previous state if it changed).'''
+        if self.state == 'closed':
+            return True, False, None
+        if not self.is_available():
+            return False, False, None
+
+        previous: BreakerState | None = None
+        if self.state == 'open':
+            previous, self.state = 'open', 'half_open'
+        self._probes_in_flight += 1
+        self._last_probe_at = self._clock()
+        return True, True, previous
+
+    def record(
+        self, *, failed: bool, probe: bool, epoch: int, timeout: bool = False
+    ) -> BreakerState | None:
+        '''Store an outcome; returns the previous state if it caused a transition.'''
+        if failed:
+            if timeout:
+                self.timeouts += 1
+            else:
+                self.errors += 1
+
+        if probe:
+            if not self._is_current_probe(epoch):
+                return None
+            self._probes_in_flight -= 1
+            self._outcomes.clear()
+            if failed:
+                self._open()
+                return 'half_open'
+            self._close()
+            return 'half_open'
+
+        # A call admitted while closed can finish after the breaker opened; only probes
+        # decide what happens from there.
+        if self.state != 'closed':
+            return None
+        self._outcomes.append(failed)
+        if self._should_open():
+            self._open()
+            return 'closed'
+        return None
+
+    def release(self, *, probe: bool, epoch: int) -> None:
+        '''Give back a probe slot when the call ended without an outcome (cancelled).'''
+        if probe and self._is_current_probe(epoch):
+            self._probes_in_flight -= 1
+
+    @property
+    def epoch(self) -> int:
+        return self._epoch
+
+    def _is_current_probe(self, epoch: int) -> bool:
+        return self.state == 'half_open' and epoch == self._epoch and self._probes_in_flight > 0
+
+    def failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(self._outcomes) / len(self._outcomes)
+
+    def _should_open(self) -> bool:
+        return (
+            len(self._outcomes) >= self.config.min_calls
+            and self.failure_rate() >= self.config.failure_rate_threshold
+        )
+
+    def _open(self) -> None:
+        self.state = 'open'
+        self._opened_at = self._clock()
+        self._epoch += 1
+        self._probes_in_flight = 0
+
+    def _close(self) -> None:
+        self.state = 'closed'
+        self._epoch += 1
+        self._probes_in_flight = 0
+
+
+class CircuitBreakerRegistry:
+    '''Holds one breaker per (provider, model) and counts state transitions.'''
+
+    def __init__(
+        self,
+        config: BreakerConfig | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.config = config or BreakerConfig()
+        self._clock = clock
+        self._breakers: dict[tuple[str, str], CircuitBreaker] = {}
+        self.transitions: Counter[tuple[str, str, str, str]] = Counter()
+        self._lock = Lock()
+
+    def unavailable(self, catalog: dict[str, dict[str, object]]) -> frozenset[str]:
+        '''Catalog providers whose breaker would currently reject a call.'''
+        with self._lock:
+            return frozenset(
+                provider
+                for provider, config in catalog.items()
+                if not self._get(provider, str(config['model'])).is_available()
+            )
+
+    def acquire(self, provider: str, model: str) -> BreakerTicket | None:
+        '''Ticket to pass back with the call's outcome, or None if the breaker rejects it.'''
+        with self._lock:
+            breaker = self._get(provider, model)
+            admitted, probe, previous = breaker.acquire()
+            if previous is not None:
+                self._count(provider, model, previous, 'half_open')
+            if not admitted:
+                return None
+            return BreakerTicket(provider, model, probe, breaker.epoch)
+
+    def record_success(self, ticket: BreakerTicket) -> None:
+        self._record(ticket, failed=False)
+
+    def record_failure(self, ticket: BreakerTicket, *, timeout: bool = False) -> None:
+        self._record(ticket, failed=True, timeout=timeout)
+
+    def release(self, ticket: BreakerTicket) -> None:
+        with self._lock:
+            self._get(ticket.provider, ticket.model).release(
+                probe=ticket.probe, epoch=ticket.epoch
+            )
+
+    def to_dict(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                'breakers': {
+                    f'{provider}:{model}': {
+                        'state': breaker.state,
+                        'failure_rate': round(breaker.failure_rate(), 3),
+                        'errors': breaker.errors,
+                        'timeouts': breaker.timeouts,
+                    }
+                    for (provider, model), breaker in self._breakers.items()
+                },
+                'transitions': [
+                    {
+                        'provider': provider,
+                        'model': model,
+                        'from': before,
+                        'to': after,
+                        'count': count,
+                    }
+                    for (provider, model, before, after), count in self.transitions.items()
+                ],
+            }
+
+    def _record(self, ticket: BreakerTicket, *, failed: bool, timeout: bool = False) -> None:
+        with self._lock:
+            breaker = self._get(ticket.provider, ticket.model)
+            previous = breaker.record(
+                failed=failed, probe=ticket.probe, epoch=ticket.epoch, timeout=timeout
+            )
+            if previous is not None:
+                self._count(ticket.provider, ticket.model, previous, breaker.state)
+
+    def _count(self, provider: str, model: str, before: str, after: str) -> None:
+        self.transitions[(provider, model, before, after)] += 1
+
+    def _get(self, provider: str, model: str) -> CircuitBreaker:
+        breaker = self._breakers.get((provider, model))
+        if breaker is None:
+            breaker = self._breakers[(provider, model)] = CircuitBreaker(self.config, self._clock)
+        return breaker
@@ -31,9 +31,17 @@ Requisitos:
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Final
+from typing import TYPE_CHECKING, Final
 
 from ..models.schemas import RouterRequest
+from ..providers.tokenizers import TokenCounter, get_token_counter
+
+if TYPE_CHECKING:
+    from .semantic_router import SemanticVote
+
+
+class NoProviderAvailable(Exception):
+    '''Raised when the preferred provider and all its fallbacks are unavailable.'''
 
 
 @dataclass
@@ -86,35 +94,118 @@ class DecisionRules:
         'poster',
     )
 
-    def __init__(self) -> None:
+    # Next-best candidates when a provider is unavailable (e.g. open circuit breaker).
+    FALLBACKS: Final[dict[str, tuple[str, ...]]] = {
+        'openai': ('gemini_pro',),
+        'gemini_pro': ('openai',),
+        'gemini_flash_image': ('gemini_pro', 'openai'),
+    }
+    SEMANTIC_MIN_CONFIDENCE: Final[float] = 0.6
+    # Confidence is a share among the nearest exemplars, so it is high even when all
+    # of them are far away; the best match must also be close in absolute terms.
+    SEMANTIC_MIN_SIMILARITY: Final[float] = 0.6
+    SEMANTIC_SCORE_BONUS: Final[float] = 0.06
+
+    def __init__(self, token_counter: TokenCounter | None = None) -> None:
+        self.token_counter = token_counter or get_token_counter()
         self.catalog = {
             'openai': {
                 'model': 'gpt-4o-mini',
                 'cost': 0.0015,
+                'input_usd_per_mtok': 0.15,
                 'latency': 850,
                 'score': 0.82,
             },
             'gemini_pro': {
                 'model': 'gemini-2.5-pro',
                 'cost': 0.0028,
+                'input_usd_per_mtok': 1.25,
                 'latency': 900,
                 'score': 0.91,
             },
             'gemini_flash_image': {
                 'model': 'gemini-2.5-flash-image',
                 'cost': 0.0035,
+                'input_usd_per_mtok': 0.30,
                 'latency': 980,
                 'score': 0.88,
             },
         }
 
-    def select(self, payload: RouterRequest) -> RoutingDecision:
-        signals = self._extract_signals(payload)
+    def select(
+        self,
+        payload: RouterRequest,
+        *,
+        semantic_vote: 'SemanticVote | None' = None,
+        excluded: frozenset[str] = frozenset(),
+    ) -> RoutingDecision:
+        '''Best provider not in `excluded`; raises NoProviderAvailable if none is left.'''
+        signals = self._extract_signals(payload, semantic_vote)
         provider_key, rationale_parts = self._choose_provider(payload, signals)
+        if provider_key in excluded:
+            preferred = self.catalog[provider_key]['model']
+            fallback = next(
+                (key for key in self.FALLBACKS[provider_key] if key not in excluded), None
+            )
+            if fallback is None:
+                raise NoProviderAvailable(f'No provider available for {provider_key!r}')
+            rationale_parts = [
+                f'{preferred} no esta disponible (circuit breaker abierto), se usa '
+                f'{self.catalog[fallback]["model"]} como siguiente mejor opcion.',
+                *rationale_parts,
+            ]
+            provider_key = fallback
+        return self._build_decision(provider_key, rationale_parts, payload, signals)
+
+    def cheaper_alternatives(
+        self,
+        payload: RouterRequest,
+        decision: RoutingDecision,
+        *,
+        excluded: frozenset[str] = frozenset(),
+    ) -> list[RoutingDecision]:
+        '''Text providers cheaper than `decision`, least downgrade first.'''
+        if decision.provider == 'gemini_flash_image':
+            return []
+
+        signals = self._extract_signals(payload)
+        alternatives = []
+        for provider_key in self.catalog:
+            if provider_key in (decision.provider, 'gemini_flash_image') or provider_key in excluded:
+                continue
+            rationale = [
+                f'Presupuesto del tenant agotado para {decision.model}, se degrada a '
+                f'{self.catalog[provider_key]["model"]}.',
+                self._describe_signals(signals),
+            ]
+            candidate = self._build_decision(provider_key, rationale, payload, signals)
+            if candidate.estimated_cost_usd < decision.estimated_cost_usd:
+                alternatives.append(candidate)
+
+        alternatives.sort(key=lambda candidate: candidate.estimated_cost_usd, reverse=True)
+        return alternatives
+
+    def input_token_price(self, provider_key: str) -> float:
+        '''USD charged per prompt token by the provider's model.'''
+        return self.catalog[provider_key]['input_usd_per_mtok'] / 1_000_000
+
+    def input_tokens(self, payload: RouterRequest, model: str) -> int:
+        '''Prompt tokens for `model`, reusing the count the router made for this request.'''
+        tokens = payload.input_tokens.get(self.token_counter.family_for(model))
+        return tokens if tokens is not None else self.token_counter.count(payload.query, model)
+
+    def _build_decision(
+        self,
+        provider_key: str,
+        rationale_parts: list[str],
+        payload: RouterRequest,
+        signals: 'RuleSignals',
+    ) -> RoutingDecision:
         config = self.catalog[provider_key]
 
-        cost = self._adjust_cost(config['cost'], payload, signals)
-        latency = self._adjust_latency(config['latency'], payload, signals)
+        input_tokens = self.input_tokens(payload, config['model'])
+        cost = self._adjust_cost(config['cost'], payload, signals, input_tokens)
+        latency = self._adjust_latency(config['latency'], payload, signals, input_tokens)
         score = self._adjust_score(config['score'], provider_key, payload, signals)
 
         return RoutingDecision(
@@ -126,7 +217,9 @@ class DecisionRules:
             score=round(min(score, 0.99), 2),
         )
 
-    def _extract_signals(self, payload: RouterRequest) -> 'RuleSignals':
+    def _extract_signals(
+        self, payload: RouterRequest, semantic_vote: 'SemanticVote | None' = None
+    ) -> 'RuleSignals':
         query = payload.query.strip().lower()
         word_count = len(query.split()) or 1
         has_analytical = any(keyword in query for keyword in self.ANALYTICAL_KEYWORDS)
@@ -145,15 +238,27 @@ class DecisionRules:
             importance_precision=precision,
             importance_latency=latency,
             importance_cost=cost,
+            semantic_provider=self._confident_semantic_provider(semantic_vote),
         )
 
+    def _confident_semantic_provider(self, vote: 'SemanticVote | None') -> str | None:
+        if vote is None or vote.confidence < self.SEMANTIC_MIN_CONFIDENCE:
+            return None
+        if vote.similarity < self.SEMANTIC_MIN_SIMILARITY:
+            return None
+        return vote.provider if vote.provider in self.catalog else None
+
     def _choose_provider(
         self, payload: RouterRequest, signals: 'RuleSignals'
     ) -> tuple[str, list[str]]:
+        semantic = signals.semantic_provider
+        # A semantic vote alone never selects the image model: it only backs visual cues.
         if signals.has_visual_cues:
             rationale = [
                 'Se detecto intencion visual en la query, por lo que se deriva a Gemini Flash Image.'
             ]
+            if semantic == 'gemini_flash_image':
+                rationale.append('La similitud semantica con ejemplos visuales respalda la eleccion.')
             if payload.modality != 'image':
                 rationale.append('La inferencia se realizo aun con modalidad text para asegurar cobertura.')
             return 'gemini_flash_image', rationale
@@ -165,11 +270,16 @@ class DecisionRules:
             ]
             return 'openai', rationale
 
-        if signals.has_analytical_keywords or signals.query_length >= 150:
+        # A confident semantic vote overrides the keyword match in both directions:
+        # paraphrases without keywords reach Gemini Pro and casual uses of 'plan' do not.
+        keyword_analytical = signals.has_analytical_keywords and semantic != 'openai'
+        if keyword_analytical or semantic == 'gemini_pro' or signals.query_length >= 150:
             rationale = [
                 'La query es analitica o extensa, se prefiere Gemini 2.5 Pro para razonamientos largos.',
                 self._describe_signals(signals),
             ]
+            if semantic == 'gemini_pro' and not signals.has_analytical_keywords:
+                rationale.insert(1, 'La similitud semantica con ejemplos analiticos respalda la eleccion.')
             return 'gemini_pro', rationale
 
         if signals.importance_cost >= 0.7 and signals.query_length <= 80:
@@ -215,6 +325,11 @@ class DecisionRules:
             )
         if signals.query_length > 180 and signals.importance_precision < 0.6:
             score -= 0.04
+        if signals.semantic_provider == 'openai':
+            score += self.SEMANTIC_SCORE_BONUS
+            rationale.append('La query se parece a ejemplos de respuestas rapidas.')
+        elif signals.semantic_provider == 'gemini_pro':
+            score -= self.SEMANTIC_SCORE_BONUS
 
         return score, rationale
 
@@ -222,7 +337,7 @@ class DecisionRules:
         score = self.catalog['gemini_pro']['score']
         rationale = ['Gemini 2.5 Pro se usa para respuestas mas pensadas.']
 
-        if signals.has_analytical_keywords:
+        if signals.has_analytical_keywords and signals.semantic_provider != 'openai':
             score += 0.08
             rationale.append('Se detectaron palabras clave analiticas.')
         if signals.query_length >= 120:
@@ -237,13 +352,17 @@ class DecisionRules:
             score -= 0.04
         if signals.query_length <= 60:
             score -= 0.02
+        if signals.semantic_provider == 'gemini_pro':
+            score += self.SEMANTIC_SCORE_BONUS
+        elif signals.semantic_provider == 'openai':
+            score -= self.SEMANTIC_SCORE_BONUS
 
         return score, rationale
 
     def _adjust_cost(
-        self, base_cost: float, payload: RouterRequest, signals: 'RuleSignals'
+        self, base_cost: float, payload: RouterRequest, signals: 'RuleSignals', input_tokens: int
     ) -> float:
-        length_factor = 1 + min(0.35, signals.query_length / 800)
+        length_factor = 1 + min(0.35, input_tokens / 1000)
         if payload.modality == 'image':
             length_factor += 0.15
 
@@ -257,7 +376,11 @@ class DecisionRules:
         return base_cost * length_factor * tier_factor * budget_factor
 
     def _adjust_latency(
-        self, base_latency: int, payload: RouterRequest, signals: 'RuleSignals'
+        self,
+        base_latency: int,
+        payload: RouterRequest,
+        signals: 'RuleSignals',
+        input_tokens: int,
     ) -> float:
         latency = float(base_latency)
 
@@ -271,8 +394,10 @@ class DecisionRules:
         elif signals.importance_latency <= 0.35:
             latency *= 1.12
 
-        if signals.query_length >= 180 and payload.modality == 'text':
+        if input_tokens >= 240 and payload.modality == 'text':
             latency *= 1.05
+        # Prompt prefill grows with input tokens and dominates time-to-first-token.
+        latency *= 1 + min(0.25, input_tokens / 16000)
 
         if payload.user_tier == 'enterprise':
             latency *= 0.9
@@ -348,3 +473,4 @@ class RuleSignals:
     importance_precision: float
     importance_latency: float
     importance_cost: float
+    semantic_provider: str | None = None
@@ -0,0 +1,208 @@
+'''Deterministic prompt compaction applied before a request is dispatched.
+
+The stage runs four pure text passes, in order:
+
+1. collapse whitespace (trailing spaces, runs of spaces/tabs, blank-line runs);
+   leading indentation and fenced code blocks are kept as-is;
+2. drop low-information boilerplate lines (greetings, sign-offs, "sent from my
+   phone", confidentiality footers);
+3. drop repeated passages: paragraphs, long lines and long sentences that
+   already appeared earlier in the prompt;
+4. truncate to the token budget of the user tier, keeping the head and the
+   tail of the prompt around an elision marker.
+
+The same input always yields the same output, so compacted prompts keep
+hitting the response cache.
+'''
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Final
+
+from ..providers.tokenizers import TokenCounter, get_token_counter
+
+DEFAULT_TIER_BUDGETS: Final[dict[str, int]] = {
+    'free': 1024,
+    'pro': 2048,
+    'enterprise': 4096,
+}
+ELISION_MARKER: Final[str] = '\n[...]\n'
+
+BOILERPLATE_PATTERNS: Final[tuple[str, ...]] = (
+    r'(hi|hello|hey|hola|buen(os|as) (dias|tardes|noches))( (there|team|all|a todos))?[,.!]*',
+    r'(i hope|hope) (this|you)( message| email)?( finds you| are)( doing)? well[,.!]*',
+    r'espero que (este|estes|esten|se encuentre)[ns]? bien[,.!]*',
+    r'(thanks|thank you|many thanks|muchas gracias|gracias)( (in advance|de antemano|por (tu|su) ayuda))?[,.!]*',
+    r'(best|kind|warm)( regards)?[,.!]*|regards[,.!]*|cheers[,.!]*|saludos( cordiales)?[,.!]*|un saludo[,.!]*',
+    r'sent from my [\w ]+|enviado desde mi [\w ]+',
+    r'(this (e-?mail|message) (is|and any attachments are) confidential|confidentiality notice|aviso de confidencialidad)\b.*',
+)
+_BOILERPLATE_RE: Final = re.compile(
+    r'(?:' + '|'.join(BOILERPLATE_PATTERNS) + r')', re.IGNORECASE
+)
+_FENCE_RE: Final = re.compile(r'(```.*?(?:```|\Z))', re.DOTALL)
+_INNER_SPACES_RE: Final = re.compile(r'(?<=\S)[ \t]{2,}')
+_BLANK_LINES_RE: Final = re.compile(r'\n{3,}')
+_SENTENCE_RE: Final = re.compile(r'[^.!?\n]+(?:[.!?]+|$)')
+_NORMALIZE_RE: Final = re.compile(r'\W+')
+
+# Shorter units repeat legitimately (closing braces, "Yes.", list markers).
+MIN_DEDUP_CHARS: Final[int] = 40
+
+
+@dataclass(frozen=True, slots=True)
+class CompactionResult:
+    text: str
+    input_tokens_before: int
+    input_tokens_after: int
+    truncated: bool = False
+
+    @property
+    def input_tokens_saved(self) -> int:
+        return self.input_tokens_before - self.input_tokens_after
+
+
+@dataclass(slots=True)
+class CompactionStats:
+    requests: int = 0
+    compacted: int = 0
+    truncated: int = 0
+    input_tokens_saved: int = 0
+    cost_saved_usd: float = 0.0
+
+    def record(self, result: CompactionResult, cost_saved_usd: float) -> None:
+        self.requests += 1
+        if result.input_tokens_saved > 0:
+            self.compacted += 1
+            self.truncated += int(result.truncated)
+            self.input_tokens_saved += result.input_tokens_saved
+            self.cost_saved_usd += cost_saved_usd
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            'requests': self.requests,
+            'compacted': self.compacted,
+            'truncated': self.truncated,
+            'input_tokens_saved': self.input_tokens_saved,
+            'cost_saved_usd': round(self.cost_saved_usd, 8),
+        }
+
+
+class PromptCompactor:
+    '''Shrinks prompts for cost- or latency-sensitive requests.'''
+
+    def __init__(
+        self,
+        token_counter: TokenCounter | None = None,
+        *,
+        tier_budgets: dict[str, int] | None = None,
+        min_importance: float = 0.7,
+    ) -> None:
+        self.token_counter = token_counter or get_token_counter()
+        self.tier_budgets = dict(tier_budgets or DEFAULT_TIER_BUDGETS)
+        self.min_importance = min_importance
+        self.stats = CompactionStats()
+
+    def applies_to(self, importance_cost: float, importance_latency: float) -> bool:
+        return max(importance_cost, importance_latency) >= self.min_importance
+
+    def compact(self, text: str, *, user_tier: str, model: str | None = None) -> CompactionResult:
+        before = self.token_counter.count(text, model)
+        compacted = self._compact_prose(text)
+        if not compacted:
+            # Never send an empty prompt: a message made only of boilerplate stays as sent.
+            compacted = text.strip()
+
+        budget = self.tier_budgets.get(user_tier)
+        after = self.token_counter.count(compacted, model)
+        truncated = False
+        if budget is not None and after > budget:
+            compacted = self._truncate(compacted, budget, model)
+            after = self.token_counter.count(compacted, model)
+            truncated = True
+
+        if after >= before:
+            return CompactionResult(text, before, before)
+        return CompactionResult(compacted, before, after, truncated)
+
+    def _compact_prose(self, text: str) -> str:
+        # Fenced code blocks are copied verbatim: indentation and repeats are meaningful there.
+        parts = _FENCE_RE.split(text.replace('\r\n', '\n').replace('\r', '\n'))
+        seen: set[str] = set()
+        for index in range(0, len(parts), 2):
+            prose = self._drop_boilerplate(self._collapse_whitespace(parts[index]))
+            parts[index] = self._dedupe(prose, seen)
+        return _BLANK_LINES_RE.sub('\n\n', '\n\n'.join(part for part in parts if part)).strip()
+
+    @staticmethod
+    def _collapse_whitespace(text: str) -> str:
+        lines = [_INNER_SPACES_RE.sub(' ', line.rstrip()) for line in text.split('\n')]
+        return _BLANK_LINES_RE.sub('\n\n', '\n'.join(lines)).strip('\n')
+
+    @staticmethod
+    def _drop_boilerplate(text: str) -> str:
+        kept = [
+            line
+            for line in text.split('\n')
+            if not line.strip() or not _BOILERPLATE_RE.fullmatch(line.strip())
+        ]
+        return _BLANK_LINES_RE.sub('\n\n', '\n'.join(kept)).strip('\n')
+
+    def _dedupe(self, text: str, seen: set[str]) -> str:
+        paragraphs = []
+        for paragraph in text.split('\n\n'):
+            lines = paragraph.split('\n')
+            # A one-line paragraph is checked once, at line level, not twice.
+            if len(lines) > 1 and self._is_repeat(paragraph, seen):
+                continue
+            kept = [
+                self._dedupe_sentences(line, seen)
+                for line in lines
+                if not self._is_repeat(line, seen)
+            ]
+            if any(line.strip() for line in kept):
+                paragraphs.append('\n'.join(kept))
+        return '\n\n'.join(paragraphs)
+
+    def _dedupe_sentences(self, line: str, seen: set[str]) -> str:
+        sentences = _SENTENCE_RE.findall(line)
+        if len(sentences) < 2:
+            return line
+        kept = [sentence for sentence in sentences if not self._is_repeat(sentence, seen)]
+        return ' '.join(sentence.strip() for sentence in kept)
+
+    @staticmethod
+    def _is_repeat(passage: str, seen: set[str]) -> bool:
+        key = _NORMALIZE_RE.sub(' ', passage.lower()).strip()
+        if len(key) < MIN_DEDUP_CHARS:
+            return False
+        if key in seen:
+            return True
+        seen.add(key)
+        return False
+
+    def _truncate(self, text: str, budget: int, model: str | None) -> str:
+        '''Keep roughly 70% of the budget from the start and 30% from the end.'''
+        available = max(1, budget - self.token_counter.count(ELISION_MARKER, model))
+        tokens = self.token_counter.count(text, model)
+        chars = int(len(text) * available / tokens)
+        while chars > 0:
+            head_chars = chars * 7 // 10
+            head = self._cut(text[:head_chars], keep='start')
+            tail = self._cut(text[len(text) - (chars - head_chars) :], keep='end')
+            candidate = head + ELISION_MARKER + tail
+            if self.token_counter.count(candidate, model) <= budget:
+                return candidate
+            chars = chars * 9 // 10
+        return self._cut(text[: max(1, budget)], keep='start')
+
+    @staticmethod
+    def _cut(fragment: str, *, keep: str) -> str:
+        # Cut on whitespace so no word or number is split in half.
+        if keep == 'start':
+            boundary = fragment.rfind(' ')
+            return (fragment[:boundary] if boundary > 0 else fragment).rstrip()
+        boundary = fragment.find(' ')
+        return (fragment[boundary + 1 :] if boundary >= 0 else fragment).lstrip()
@@ -0,0 +1,155 @@
+'''In-memory per-tenant token buckets for request rate and USD spend.'''
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable
+
+
+class RateLimitExceeded(Exception):
+    '''Raised when a tenant has no request or budget tokens left.'''
+
+    def __init__(self, tenant: str, reason: str, retry_after_s: float) -> None:
+        super().__init__(f'Tenant {tenant!r} exceeded its {reason} limit')
+        self.tenant = tenant
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+@dataclass(frozen=True, slots=True)
+class TenantLimits:
+    requests_per_second: float = 5.0
+    request_burst: float = 20.0
+    usd_per_minute: float = 0.25
+
+    @property
+    def usd_per_second(self) -> float:
+        return self.usd_per_minute / 60
+
+    @property
+    def usd_burst(self) -> float:
+        return self.usd_per_minute
+
+
+class _TenantBuckets:
+    '''Both buckets of one tenant; kept tiny because there can be many of them.'''
+
+    __slots__ = ('request_tokens', 'usd_tokens', 'updated_at')
+
+    def __init__(self, limits: TenantLimits, now: float) -> None:
+        self.request_tokens = limits.request_burst
+        self.usd_tokens = limits.usd_burst
+        self.updated_at = now
+
+    def refill(self, limits: TenantLimits, now: float) -> None:
+        elapsed = now - self.updated_at
+        if elapsed <= 0:
+            return
+        self.request_tokens = min(
+            limits.request_burst, self.request_tokens + elapsed * limits.requests_per_second
+        )
+        self.usd_tokens = min(limits.usd_burst, self.usd_tokens + elapsed * limits.usd_per_second)
+        self.updated_at = now
+
+    def seconds_until_full(self, limits: TenantLimits, now: float) -> float:
+        requests_s = (limits.request_burst - self.request_tokens) / limits.requests_per_second
+        usd_s = (limits.usd_burst - self.usd_tokens) / limits.usd_per_second
+        return max(0.0, self.updated_at + max(requests_s, usd_s) - now)
+
+
+class TenantRateLimiter:
+    '''O(1) token-bucket limiter keyed by tenant with LRU and idle-bucket eviction.
+
+    A bucket that is evicted and later recreated starts full, so only buckets that
+    would have refilled completely anyway are evicted. When `max_tenants` buckets
+    are all still refilling, a new tenant is refused with `RateLimitExceeded`
+    until the least recently used one is full, rather than handing a returning
+    tenant a fresh burst.
+    '''
+
+    def __init__(
+        self,
+        limits: TenantLimits | None = None,
+        *,
+        max_tenants: int = 200_000,
+        idle_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.limits = limits or TenantLimits()
+        self.max_tenants = max(1, max_tenants)
+        self.idle_seconds = max(
+            idle_seconds,
+            self.limits.request_burst / self.limits.requests_per_second,
+            60.0,
+        )
+        self._clock = clock
+        self._buckets: OrderedDict[str, _TenantBuckets] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire_request(self, tenant: str) -> None:
+        with self._lock:
+            buckets = self._touch(tenant)
+            if buckets.request_tokens < 1:
+                missing = 1 - buckets.request_tokens
+                raise RateLimitExceeded(
+                    tenant, 'requests/s', missing / self.limits.requests_per_second
+                )
+            buckets.request_tokens -= 1
+
+    def try_charge(self, tenant: str, usd: float) -> bool:
+        with self._lock:
+            buckets = self._touch(tenant)
+            if buckets.usd_tokens < usd:
+                return False
+            buckets.usd_tokens -= usd
+            return True
+
+    def reconcile(self, tenant: str, estimated_usd: float, actual_usd: float) -> None:
+        '''Replace an estimated charge with the realized cost; may leave a debt.'''
+        with self._lock:
+            if tenant not in self._buckets:
+                # Only full buckets are evicted, and a refund could not raise a full one.
+                return
+            buckets = self._touch(tenant)
+            buckets.usd_tokens = min(
+                self.limits.usd_burst, buckets.usd_tokens + estimated_usd - actual_usd
+            )
+
+    def budget_retry_after(self, tenant: str, usd: float) -> float:
+        with self._lock:
+            buckets = self._touch(tenant)
+            missing = max(0.0, usd - buckets.usd_tokens)
+        return missing / self.limits.usd_per_second
+
+    def _touch(self, tenant: str) -> _TenantBuckets:
+        now = self._clock()
+        buckets = self._buckets.get(tenant)
+        if buckets is None:
+            self._evict(tenant, now)
+            buckets = self._buckets[tenant] = _TenantBuckets(self.limits, now)
+        else:
+            self._buckets.move_to_end(tenant)
+            buckets.refill(self.limits, now)
+        return buckets
+
+    def _evict(self, tenant: str, now: float) -> None:
+        # The front of the OrderedDict is the least recently used tenant, so each
+        # pop is O(1) and every bucket is evicted at most once.
+        cutoff = now - self.idle_seconds
+        while self._buckets:
+            oldest = next(iter(self._buckets.values()))
+            at_capacity = len(self._buckets) >= self.max_tenants
+            if oldest.updated_at >= cutoff and not at_capacity:
+                break
+            refill_s = oldest.seconds_until_full(self.limits, now)
+            if refill_s > 0:
+                if at_capacity:
+                    raise RateLimitExceeded(tenant, 'tenants', refill_s)
+                break
+            self._buckets.popitem(last=False)
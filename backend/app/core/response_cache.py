@@ -0,0 +1,266 @@
+'''Near-duplicate response cache keyed by query embedding and routing decision.
+
+Each (provider, model) pair owns a fixed-size vector store. Lookups use
+random-hyperplane LSH tables to find candidate entries and confirm them with an
+exact cosine similarity against a per-provider threshold; the least recently
+used entry is evicted when a store is full. Providers without a threshold
+(for example `gemini_flash_image`) are never cached.
+
+Character n-gram cosine barely moves when one word of a long prompt changes
+('Tuesday' vs 'Thursday', '150' vs '950', 'deploy' vs 'not deploy'), so a
+similar candidate is only served if its signature also matches: same tenant,
+same set of content words, same numbers in order and same number of negations.
+Case, punctuation, spacing and stopwords may still differ.
+'''
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Final
+
+import numpy as np
+
+from .semantic_router import HashedNgramEmbedder
+
+DEFAULT_THRESHOLDS: Final[dict[str, float]] = {
+    'openai': 0.96,
+    'gemini_pro': 0.975,
+}
+
+_WORD_RE = re.compile(r'\w+')
+_NUMBER_RE = re.compile(r'\d+(?:[.,]\d+)*')
+_CONTRACTED_NOT_RE = re.compile(r"n[\'’]t\b")
+
+NEGATIONS: Final[frozenset[str]] = frozenset(
+    {
+        'not', 'no', 'never', 'none', 'nor', 'neither', 'nothing', 'nobody', 'without',
+        'cannot', 'nunca', 'ni', 'nada', 'nadie', 'ninguno', 'ninguna', 'sin', 'tampoco',
+    }
+)
+# Single letters are never stopwords: they name things ("account A", "plan B").
+STOPWORDS: Final[frozenset[str]] = frozenset(
+    {
+        'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'at', 'for', 'with', 'is',
+        'are', 'be', 'it', 'this', 'that', 'me', 'my', 'you', 'please', 'can', 'could',
+        'would', 'do', 'does', 'el', 'la', 'los', 'las', 'un', 'una', 'de', 'del',
+        'en', 'al', 'con', 'por', 'para', 'que', 'es', 'mi', 'tu', 'se', 'lo',
+        'favor', 'puedes', 'podrias',
+    }
+)
+
+Signature = tuple[str, tuple[str, ...], tuple[str, ...], int]
+
+
+@dataclass(frozen=True, slots=True)
+class CacheQuery:
+    '''Embedding plus the exact signature a cached entry must share to be served.'''
+
+    vector: np.ndarray
+    signature: Signature
+
+
+@dataclass(frozen=True, slots=True)
+class CacheHit:
+    output_text: str
+    similarity: float
+    saved_latency_ms: float
+    saved_cost_usd: float
+
+
+@dataclass(slots=True)
+class CacheStats:
+    lookups: int = 0
+    hits: int = 0
+    latency_saved_ms: float = 0.0
+    cost_saved_usd: float = 0.0
+    by_provider: dict[str, list[int]] = field(default_factory=dict)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'hit_rate': round(self.hit_rate, 4),
+            'latency_saved_ms': round(self.latency_saved_ms, 2),
+            'cost_saved_usd': round(self.cost_saved_usd, 5),
+            'by_provider': {
+                provider: {'lookups': lookups, 'hits': hits}
+                for provider, (lookups, hits) in self.by_provider.items()
+            },
+        }
+
+
+class _Partition:
+    '''Bounded vector store for one (provider, model) pair.'''
+
+    def __init__(self, capacity: int, dim: int, tables: int) -> None:
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.outputs: list[str] = [''] * capacity
+        self.latency_ms = np.zeros(capacity, dtype=np.float64)
+        self.cost_usd = np.zeros(capacity, dtype=np.float64)
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.signatures: list[Signature | None] = [None] * capacity
+        self.keys = np.zeros((capacity, tables), dtype=np.int64)
+        self.buckets: list[dict[int, set[int]]] = [{} for _ in range(tables)]
+        self.size = 0
+
+    def candidates(self, keys: np.ndarray) -> list[int]:
+        found: set[int] = set()
+        for table, key in zip(self.buckets, keys.tolist()):
+            found.update(table.get(key, ()))
+        return list(found)
+
+    def allocate(self) -> int:
+        capacity = self.vectors.shape[0]
+        if self.size < capacity:
+            slot = self.size
+            self.size += 1
+            return slot
+
+        slot = int(np.argmin(self.last_used))
+        for table, key in zip(self.buckets, self.keys[slot].tolist()):
+            members = table.get(key)
+            if members is not None:
+                members.discard(slot)
+                if not members:
+                    del table[key]
+        return slot
+
+
+class SemanticResponseCache:
+    '''Approximate nearest-neighbor response cache for routed queries.'''
+
+    def __init__(
+        self,
+        embedder: HashedNgramEmbedder | None = None,
+        *,
+        thresholds: dict[str, float] | None = None,
+        capacity: int = 4096,
+        tables: int = 4,
+        bits_per_table: int = 8,
+        seed: int = 11,
+    ) -> None:
+        self.embedder = embedder or HashedNgramEmbedder()
+        self.thresholds = dict(DEFAULT_THRESHOLDS if thresholds is None else thresholds)
+        self.capacity = max(1, capacity)
+        self.tables = tables
+        self.bits_per_table = bits_per_table
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal(
+            (tables * bits_per_table, self.embedder.dim)
+        ).astype(np.float32)
+        self._powers = 1 << np.arange(bits_per_table, dtype=np.int64)
+        self._partitions: dict[tuple[str, str], _Partition] = {}
+        self._clock = 0
+        self._lock = Lock()
+        self.stats = CacheStats()
+
+    def enabled_for(self, provider: str) -> bool:
+        return provider in self.thresholds
+
+    def embed(self, query: str) -> np.ndarray:
+        # Punctuation and spacing never change the answer, so drop them before embedding.
+        return self.embedder.embed(' '.join(_WORD_RE.findall(query.lower())))
+
+    def prepare(self, query: str, tenant: str) -> CacheQuery:
+        return CacheQuery(self.embed(query), self.signature(query, tenant))
+
+    @staticmethod
+    def signature(query: str, tenant: str) -> Signature:
+        lowered = _CONTRACTED_NOT_RE.sub(' not', query.lower())
+        words = _WORD_RE.findall(lowered)
+        # Ordered: swapping who pays whom changes the answer even with the same words.
+        content = tuple(
+            word
+            for word in words
+            if word not in STOPWORDS and word not in NEGATIONS and not word.isdigit()
+        )
+        numbers = tuple(number.replace(',', '.') for number in _NUMBER_RE.findall(lowered))
+        negations = sum(1 for word in words if word in NEGATIONS)
+        return tenant, content, numbers, negations
+
+    def lookup(self, query: CacheQuery, provider: str, model: str) -> CacheHit | None:
+        threshold = self.thresholds.get(provider)
+        if threshold is None:
+            return None
+
+        vector = query.vector
+        keys = self._lsh_keys(vector)
+        with self._lock:
+            self.stats.lookups += 1
+            counts = self.stats.by_provider.setdefault(provider, [0, 0])
+            counts[0] += 1
+
+            partition = self._partitions.get((provider, model))
+            if partition is None:
+                return None
+            candidates = [
+                slot
+                for slot in partition.candidates(keys)
+                if partition.signatures[slot] == query.signature
+            ]
+            if not candidates:
+                return None
+
+            slots = np.array(candidates)
+            similarities = partition.vectors[slots] @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < threshold:
+                return None
+
+            slot = int(slots[best])
+            self._clock += 1
+            partition.last_used[slot] = self._clock
+            hit = CacheHit(
+                output_text=partition.outputs[slot],
+                similarity=float(similarities[best]),
+                saved_latency_ms=float(partition.latency_ms[slot]),
+                saved_cost_usd=float(partition.cost_usd[slot]),
+            )
+            self.stats.hits += 1
+            counts[1] += 1
+            self.stats.latency_saved_ms += hit.saved_latency_ms
+            self.stats.cost_saved_usd += hit.saved_cost_usd
+            return hit
+
+    def store(
+        self,
+        query: CacheQuery,
+        provider: str,
+        model: str,
+        output_text: str,
+        *,
+        latency_ms: float,
+        cost_usd: float,
+    ) -> None:
+        if provider not in self.thresholds:
+            return
+
+        vector = query.vector
+        keys = self._lsh_keys(vector)
+        with self._lock:
+            partition = self._partitions.get((provider, model))
+            if partition is None:
+                partition = _Partition(self.capacity, self.embedder.dim, self.tables)
+                self._partitions[(provider, model)] = partition
+
+            slot = partition.allocate()
+            self._clock += 1
+            partition.vectors[slot] = vector
+            partition.outputs[slot] = output_text
+            partition.signatures[slot] = query.signature
+            partition.latency_ms[slot] = latency_ms
+            partition.cost_usd[slot] = cost_usd
+            partition.last_used[slot] = self._clock
+            partition.keys[slot] = keys
+            for table, key in zip(partition.buckets, keys.tolist()):
+                table.setdefault(key, set()).add(slot)
+
+    def _lsh_keys(self, vector: np.ndarray) -> np.ndarray:
+        bits = (self._planes @ vector > 0).reshape(self.tables, self.bits_per_table)
+        return bits.astype(np.int64) @ self._powers
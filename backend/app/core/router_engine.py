@@ -2,15 +2,32 @@
 
 from __future__ import annotations
 
+import asyncio
+import time
 from dataclasses import dataclass
-from typing import Final
+from typing import TYPE_CHECKING, Callable, Final
 
 from ..models.schemas import RouteRequest, RouteResponse, RouterRequest
 from ..providers.base_client import LlmProviderClient
 from ..providers.gemini_flash_image_client import GeminiFlashImageClient
 from ..providers.gemini_pro_client import GeminiProClient
 from ..providers.openai_client import OpenAIClient
-from .decision_rules import DecisionRules, RoutingDecision
+from .circuit_breaker import CircuitBreakerRegistry
+from .decision_rules import DecisionRules, NoProviderAvailable, RoutingDecision
+from .rate_limiter import RateLimitExceeded, TenantRateLimiter
+
+if TYPE_CHECKING:
+    from .prompt_compactor import CompactionResult, PromptCompactor
+    from .response_cache import CacheHit, SemanticResponseCache
+    from .semantic_router import SemanticRouter
+
+ProviderFactory = Callable[[], LlmProviderClient]
+
+DEFAULT_PROVIDER_FACTORIES: Final[dict[str, ProviderFactory]] = {
+    'openai': OpenAIClient,
+    'gemini_pro': GeminiProClient,
+    'gemini_flash_image': GeminiFlashImageClient,
+}
 
 IMAGE_KEYWORDS: Final[tuple[str, ...]] = (
     'image',
@@ -35,6 +52,9 @@ class RouterResult:
     cost_usd: float
     quality_score: float
     routing_explanation: str
+    cache_hit: bool = False
+    input_tokens_saved: int = 0
+    cost_saved_usd: float = 0.0
 
     def to_response(self) -> RouteResponse:
         return RouteResponse(
@@ -44,33 +64,119 @@ class RouterResult:
             cost_usd=self.cost_usd,
             quality_score=self.quality_score,
             routing_explanation=self.routing_explanation,
+            cache_hit=self.cache_hit,
+            input_tokens_saved=self.input_tokens_saved,
+            cost_saved_usd=self.cost_saved_usd,
         )
 
 
 class RouterEngine:
     '''Main entry point that coordinates routing decisions and provider calls.'''
 
-    def __init__(self, providers: dict[str, LlmProviderClient] | None = None) -> None:
-        self.rules = DecisionRules()
-        self.providers = providers or {
-            'openai': OpenAIClient(),
-            'gemini_pro': GeminiProClient(),
-            'gemini_flash_image': GeminiFlashImageClient(),
-        }
-
-    async def route(self, payload: RouteRequest) -> RouterResult:
-        internal_payload = self._to_internal_payload(payload)
-        decision = self.rules.select(internal_payload)
-        client = self.providers.get(decision.provider)
+    def __init__(
+        self,
+        providers: dict[str, LlmProviderClient] | None = None,
+        *,
+        provider_factories: dict[str, ProviderFactory] | None = None,
+        rate_limiter: TenantRateLimiter | None = None,
+        semantic_router: 'SemanticRouter | None' = None,
+        response_cache: 'SemanticResponseCache | None' = None,
+        compactor: 'PromptCompactor | None' = None,
+        rules: DecisionRules | None = None,
+        breakers: CircuitBreakerRegistry | None = None,
+        request_timeout_s: float | None = None,
+    ) -> None:
+        self.rules = rules or DecisionRules()
+        self.token_counter = self.rules.token_counter
+        self.breakers = breakers
+        self.request_timeout_s = request_timeout_s
+        self.rate_limiter = rate_limiter
+        self.semantic_router = semantic_router
+        self.response_cache = response_cache
+        self.compactor = compactor
+        # Clients are built on first use so importing/constructing the engine stays cheap.
+        self.providers: dict[str, LlmProviderClient] = dict(providers or {})
+        if providers is None:
+            self._factories = dict(provider_factories or DEFAULT_PROVIDER_FACTORIES)
+        else:
+            self._factories = dict(provider_factories or {})
 
+    def get_client(self, provider: str) -> LlmProviderClient:
+        client = self.providers.get(provider)
         if client is None:
-            raise KeyError(f'Provider {decision.provider!r} is not configured')
+            factory = self._factories.get(provider)
+            if factory is None:
+                raise KeyError(f'Provider {provider!r} is not configured')
+            client = self.providers.setdefault(provider, factory())
+        return client
 
-        output = await client.generate(internal_payload, model=decision.model)
+    async def route(self, payload: RouteRequest, *, tenant: str = 'anonymous') -> RouterResult:
+        internal_payload = self._to_internal_payload(payload)
+        compaction = None
+        if self.compactor is not None and self.compactor.applies_to(
+            payload.importance_cost, payload.importance_latency
+        ):
+            internal_payload, compaction = self._compact(
+                self.compactor, payload, internal_payload
+            )
+        semantic_vote = (
+            self.semantic_router.vote(internal_payload.query) if self.semantic_router else None
+        )
+        excluded = (
+            self.breakers.unavailable(self.rules.catalog) if self.breakers else frozenset()
+        )
+        decision = self.rules.select(
+            internal_payload, semantic_vote=semantic_vote, excluded=excluded
+        )
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire_request(tenant)
+            decision = self._charge_budget(
+                self.rate_limiter, tenant, internal_payload, decision, excluded
+            )
+        cache = self.response_cache
+        cache_query = None
+        if cache is not None and cache.enabled_for(decision.provider):
+            # Entries are scoped to the tenant so one tenant's answers never reach another.
+            cache_query = cache.prepare(internal_payload.query, tenant)
+            hit = cache.lookup(cache_query, decision.provider, decision.model)
+            if hit is not None:
+                return self._cached_result(payload, decision, hit, tenant)
+
+        client = self.get_client(decision.provider)
+        started = time.perf_counter()
+        try:
+            output = await self._call_provider(client, internal_payload, decision)
+        except BaseException:
+            if self.rate_limiter is not None:
+                self.rate_limiter.reconcile(tenant, decision.estimated_cost_usd, 0.0)
+            raise
+        generate_ms = (time.perf_counter() - started) * 1000
         latency_ms = self._derive_latency(payload.importance_latency, decision)
-        cost_usd = self._derive_cost(payload.user_query, decision)
+        cost_usd = self._derive_cost(
+            self.rules.input_tokens(internal_payload, decision.model), decision
+        )
+        if self.rate_limiter is not None:
+            self.rate_limiter.reconcile(tenant, decision.estimated_cost_usd, cost_usd)
+        if cache is not None and cache_query is not None:
+            cache.store(
+                cache_query,
+                decision.provider,
+                decision.model,
+                output,
+                latency_ms=generate_ms,
+                cost_usd=cost_usd,
+            )
         quality_score = self._derive_quality(payload.importance_precision, decision)
         explanation = self._compose_rationale(payload, decision)
+        tokens_saved = 0
+        cost_saved_usd = 0.0
+        if compaction is not None:
+            tokens_saved = compaction.input_tokens_saved
+            # Priced per token: the request-level cost estimate saturates on long prompts.
+            cost_saved_usd = tokens_saved * self.rules.input_token_price(decision.provider)
+            self.compactor.stats.record(compaction, cost_saved_usd)
+            if tokens_saved:
+                explanation += f' Prompt compactado: {tokens_saved} tokens de entrada menos.'
 
         return RouterResult(
             provider=decision.provider,
@@ -80,7 +186,92 @@ class RouterEngine:
             cost_usd=cost_usd,
             quality_score=quality_score,
             routing_explanation=explanation,
+            input_tokens_saved=tokens_saved,
+            cost_saved_usd=round(cost_saved_usd, 8),
+        )
+
+    async def _call_provider(
+        self, client: LlmProviderClient, payload: RouterRequest, decision: RoutingDecision
+    ) -> str:
+        breakers = self.breakers
+        ticket = None
+        if breakers is not None:
+            ticket = breakers.acquire(decision.provider, decision.model)
+            if ticket is None:
+                raise NoProviderAvailable(f'Circuit breaker open for {decision.provider!r}')
+
+        call = client.generate(payload, model=decision.model)
+        if self.request_timeout_s is not None:
+            call = asyncio.wait_for(call, timeout=self.request_timeout_s)
+        if breakers is None or ticket is None:
+            return await call
+        try:
+            output = await call
+        except TimeoutError:
+            breakers.record_failure(ticket, timeout=True)
+            raise
+        except asyncio.CancelledError:
+            breakers.release(ticket)
+            raise
+        except Exception:
+            breakers.record_failure(ticket)
+            raise
+        breakers.record_success(ticket)
+        return output
+
+    def _compact(
+        self, compactor: 'PromptCompactor', payload: RouteRequest, internal_payload: RouterRequest
+    ) -> tuple[RouterRequest, 'CompactionResult']:
+        '''Shrink the prompt before routing so estimates, budget and cache all see what is sent.'''
+        compaction = compactor.compact(internal_payload.query, user_tier=internal_payload.user_tier)
+        if compaction.input_tokens_saved <= 0:
+            return internal_payload, compaction
+        compacted = internal_payload.model_copy(
+            update={
+                'query': compaction.text,
+                'max_tokens': self._estimate_max_tokens(payload, compaction.input_tokens_after),
+                'input_tokens': self._count_input_tokens(compaction.text),
+            }
         )
+        return compacted, compaction
+
+    def _cached_result(
+        self, payload: RouteRequest, decision: RoutingDecision, hit: 'CacheHit', tenant: str
+    ) -> RouterResult:
+        # No provider call was made, so the reserved budget is fully refunded.
+        if self.rate_limiter is not None:
+            self.rate_limiter.reconcile(tenant, decision.estimated_cost_usd, 0.0)
+        explanation = self._compose_rationale(payload, decision)
+        return RouterResult(
+            provider=decision.provider,
+            chosen_model=decision.model,
+            output_text=hit.output_text,
+            latency_ms=0.0,
+            cost_usd=0.0,
+            quality_score=self._derive_quality(payload.importance_precision, decision),
+            routing_explanation=(
+                f'{explanation} Respuesta servida desde cache semantico '
+                f'(similitud {hit.similarity:.3f}).'
+            ),
+            cache_hit=True,
+        )
+
+    def _charge_budget(
+        self,
+        limiter: TenantRateLimiter,
+        tenant: str,
+        payload: RouterRequest,
+        decision: RoutingDecision,
+        excluded: frozenset[str],
+    ) -> RoutingDecision:
+        '''Reserve the estimated cost, downgrading to cheaper providers before rejecting.'''
+        alternatives = self.rules.cheaper_alternatives(payload, decision, excluded=excluded)
+        for candidate in (decision, *alternatives):
+            if limiter.try_charge(tenant, candidate.estimated_cost_usd):
+                return candidate
+
+        retry_after = limiter.budget_retry_after(tenant, decision.estimated_cost_usd)
+        raise RateLimitExceeded(tenant, 'USD/min', retry_after)
 
     def _to_internal_payload(self, payload: RouteRequest) -> RouterRequest:
         query = payload.user_query.strip()
@@ -88,7 +279,10 @@ class RouterEngine:
         priority = self._resolve_priority(payload.importance_precision)
         user_tier = self._resolve_tier(payload.importance_cost)
         temperature = self._resolve_temperature(payload)
-        max_tokens = self._estimate_max_tokens(payload, len(query.split()))
+        input_tokens = self._count_input_tokens(query)
+        max_tokens = self._estimate_max_tokens(
+            payload, input_tokens[self.token_counter.family_for(None)]
+        )
 
         return RouterRequest(
             query=query,
@@ -97,8 +291,14 @@ class RouterEngine:
             priority=priority,
             max_tokens=max_tokens,
             temperature=temperature,
+            input_tokens=input_tokens,
         )
 
+    def _count_input_tokens(self, query: str) -> dict[str, int]:
+        # Counted once per request; every estimate downstream reads these numbers.
+        models = (config['model'] for config in self.rules.catalog.values())
+        return self.token_counter.count_families(query, models)
+
     def _infer_modality(self, query: str) -> str:
         lowered = query.lower()
         return 'image' if any(keyword in lowered for keyword in IMAGE_KEYWORDS) else 'text'
@@ -123,14 +323,14 @@ class RouterEngine:
             temperature = max(0.15, temperature - 0.05)
         return round(min(1.2, max(0.1, temperature)), 2)
 
-    def _estimate_max_tokens(self, payload: RouteRequest, word_count: int) -> int:
+    def _estimate_max_tokens(self, payload: RouteRequest, input_tokens: int) -> int:
         base = 512
         if payload.importance_latency >= 0.7:
             base = 256
         elif payload.importance_precision >= 0.8:
             base = 768
 
-        tokens = base + word_count * 4
+        tokens = base + input_tokens * 3
         return min(4096, max(256, tokens))
 
     def _derive_latency(self, latency_weight: float, decision: RoutingDecision) -> float:
@@ -142,8 +342,9 @@ class RouterEngine:
             factor = 1.0
         return round(decision.estimated_latency_ms * factor, 2)
 
-    def _derive_cost(self, query: str, decision: RoutingDecision) -> float:
-        token_estimate = max(1, len(query.split()) * 4)
+    def _derive_cost(self, input_tokens: int, decision: RoutingDecision) -> float:
+        # Input tokens plus an expected answer of about twice the prompt.
+        token_estimate = max(1, input_tokens * 3)
         token_factor = min(1.4, 0.65 + token_estimate / 2000)
         if 'image' in decision.model:
             token_factor += 0.1
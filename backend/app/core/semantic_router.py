@@ -0,0 +1,321 @@
+'''Optional semantic routing stage based on a local NumPy nearest-neighbor index.
+
+Queries are embedded with signed, hashed character n-grams (no model download),
+then compared against labeled exemplars of each provider. The index can be
+IVF-partitioned so that only a few clusters are scanned per query, and it is
+stored as plain `.npy` files that are memory-mapped at startup.
+
+Build an index (desde `backend/`):
+    python -m app.core.semantic_router build --out db/semantic_index [--exemplars ex.jsonl]
+where each JSONL line is `{"provider": "gemini_pro", "text": "..."}`.
+'''
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final, Iterable
+
+import numpy as np
+
+DEFAULT_EXEMPLARS: Final[dict[str, tuple[str, ...]]] = {
+    'openai': (
+        'hola, como estas?',
+        'traduce esta frase al ingles',
+        'dame un sinonimo de rapido',
+        'resume este parrafo en una linea',
+        'que hora es en tokio',
+        'write a short thank you email',
+        'what is the capital of peru',
+        'fix the typo in this sentence',
+        'planea una cena rapida para hoy',
+        'give me a quick list of fruits',
+    ),
+    'gemini_pro': (
+        'analiza las ventajas y desventajas de migrar a microservicios',
+        'compara dos estrategias de precios y justifica cual conviene',
+        'por que cae la retencion de usuarios despues del primer mes',
+        'disena una arquitectura escalable para pagos y explica los tradeoffs',
+        'evalua los riesgos de este contrato paso a paso',
+        'walk me through the reasoning behind this proof',
+        'what are the second order effects of raising interest rates',
+        'critique this research methodology in depth',
+        'build a multi quarter roadmap with dependencies and risks',
+        'investiga las causas de la latencia en nuestro pipeline de datos',
+    ),
+    'gemini_flash_image': (
+        'genera una imagen de un gato astronauta',
+        'dibuja un logo minimalista para una cafeteria',
+        'crea una ilustracion de una ciudad futurista al atardecer',
+        'disena un poster para un concierto de jazz',
+        'make a picture of a mountain lake',
+        'render a 3d mockup of a mobile app',
+        'sketch a storyboard for a product video',
+        'haz una foto realista de un perro en la playa',
+        'create an icon set for a weather app',
+        'pinta un retrato al oleo de una astronauta',
+    ),
+}
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+class HashedNgramEmbedder:
+    '''Deterministic bag of signed, hashed character n-grams plus word unigrams.'''
+
+    def __init__(self, dim: int = 512, ngram_sizes: tuple[int, ...] = (3, 4)) -> None:
+        self.dim = dim
+        self.ngram_sizes = ngram_sizes
+
+    def embed(self, text: str) -> np.ndarray:
+        features = self._features(self._normalize(text))
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if not features:
+            return vector
+
+        # crc32 is stable across processes, unlike hash().
+        hashes = np.fromiter((zlib.crc32(feature.encode()) for feature in features), dtype=np.uint32)
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+        np.add.at(vector, hashes % self.dim, signs)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def embed_many(self, texts: Iterable[str]) -> np.ndarray:
+        rows = [self.embed(text) for text in texts]
+        if not rows:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.vstack(rows)
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        decomposed = unicodedata.normalize('NFKD', text.lower())
+        stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+        return ' '.join(stripped.split())
+
+    def _features(self, text: str) -> list[str]:
+        padded = f' {text} '
+        features = [f'w:{word}' for word in _TOKEN_RE.findall(text)]
+        for size in self.ngram_sizes:
+            features.extend(padded[i : i + size] for i in range(len(padded) - size + 1))
+        return features
+
+
+@dataclass(frozen=True, slots=True)
+class SemanticVote:
+    provider: str
+    confidence: float
+    similarity: float
+
+
+class SemanticIndex:
+    '''Cosine nearest-neighbor search over exemplars, grouped into IVF lists.
+
+    `vectors` are sorted by cluster so list `i` is `vectors[offsets[i]:offsets[i + 1]]`.
+    With a single list the search is an exact, flat scan.
+    '''
+
+    FILES: Final[tuple[str, ...]] = ('vectors.npy', 'labels.npy', 'centroids.npy', 'offsets.npy')
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        labels: np.ndarray,
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        providers: list[str],
+    ) -> None:
+        self.vectors = vectors
+        self.labels = labels
+        self.centroids = centroids
+        self.offsets = offsets
+        self.providers = providers
+
+    def __len__(self) -> int:
+        return int(self.vectors.shape[0])
+
+    @property
+    def dim(self) -> int:
+        return int(self.vectors.shape[1])
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        labels: np.ndarray,
+        providers: list[str],
+        *,
+        nlist: int | None = None,
+        iterations: int = 8,
+        seed: int = 7,
+    ) -> 'SemanticIndex':
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        labels = np.asarray(labels, dtype=np.int16)
+        count = vectors.shape[0]
+        if nlist is None:
+            # Small exemplar sets are cheaper to scan exactly.
+            nlist = 1 if count < 4096 else int(math.sqrt(count))
+        nlist = max(1, min(nlist, count))
+
+        if nlist == 1:
+            centroid = vectors.mean(axis=0, keepdims=True)
+            return cls(vectors, labels, centroid, np.array([0, count], dtype=np.int64), providers)
+
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(count, size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            for cluster in range(nlist):
+                members = vectors[assignment == cluster]
+                if len(members):
+                    mean = members.mean(axis=0)
+                    centroids[cluster] = mean / (np.linalg.norm(mean) or 1.0)
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+
+        order = np.argsort(assignment, kind='stable')
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=nlist), out=offsets[1:])
+        return cls(vectors[order], labels[order], centroids, offsets, providers)
+
+    @classmethod
+    def from_exemplars(
+        cls,
+        exemplars: dict[str, Iterable[str]],
+        embedder: HashedNgramEmbedder,
+        **build_options: int | None,
+    ) -> 'SemanticIndex':
+        providers = sorted(exemplars)
+        texts: list[str] = []
+        labels: list[int] = []
+        for code, provider in enumerate(providers):
+            for text in exemplars[provider]:
+                texts.append(text)
+                labels.append(code)
+        return cls.build(embedder.embed_many(texts), np.array(labels), providers, **build_options)
+
+    def save(self, directory: str | Path) -> None:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, array in zip(self.FILES, (self.vectors, self.labels, self.centroids, self.offsets)):
+            np.save(directory / name, array)
+        (directory / 'meta.json').write_text(json.dumps({'providers': self.providers}))
+
+    @classmethod
+    def load(cls, directory: str | Path, *, mmap: bool = True) -> 'SemanticIndex':
+        directory = Path(directory)
+        mode = 'r' if mmap else None
+        vectors, labels, centroids, offsets = (
+            np.load(directory / name, mmap_mode=mode) for name in cls.FILES
+        )
+        meta = json.loads((directory / 'meta.json').read_text())
+        # Centroids and offsets are tiny and touched on every query; keep them in RAM.
+        return cls(vectors, labels, np.asarray(centroids), np.asarray(offsets), meta['providers'])
+
+    def search(self, query: np.ndarray, *, k: int = 8, nprobe: int = 4) -> tuple[np.ndarray, np.ndarray]:
+        '''Return (similarities, label codes) of the top-k exemplars, best first.'''
+        nlist = self.centroids.shape[0]
+        if nlist == 1:
+            probes = np.array([0])
+        else:
+            nprobe = min(nprobe, nlist)
+            probes = np.argpartition(self.centroids @ query, nlist - nprobe)[-nprobe:]
+
+        scores: list[np.ndarray] = []
+        labels: list[np.ndarray] = []
+        for cluster in probes:
+            start, end = int(self.offsets[cluster]), int(self.offsets[cluster + 1])
+            if start == end:
+                continue
+            scores.append(self.vectors[start:end] @ query)
+            labels.append(self.labels[start:end])
+        if not scores:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int16)
+
+        all_scores = np.concatenate(scores)
+        all_labels = np.concatenate(labels)
+        k = min(k, all_scores.shape[0])
+        top = np.argpartition(all_scores, all_scores.shape[0] - k)[-k:]
+        top = top[np.argsort(all_scores[top])[::-1]]
+        return all_scores[top], all_labels[top]
+
+
+class SemanticRouter:
+    '''Turns the nearest exemplars of a query into a provider vote.'''
+
+    def __init__(
+        self,
+        index: SemanticIndex,
+        embedder: HashedNgramEmbedder | None = None,
+        *,
+        k: int = 8,
+        nprobe: int = 4,
+        min_similarity: float = 0.2,
+        temperature: float = 0.05,
+    ) -> None:
+        self.index = index
+        self.embedder = embedder or HashedNgramEmbedder(dim=index.dim)
+        self.k = k
+        self.nprobe = nprobe
+        self.min_similarity = min_similarity
+        self.temperature = temperature
+
+    @classmethod
+    def from_path_or_defaults(cls, directory: str | Path | None) -> 'SemanticRouter':
+        if directory and (Path(directory) / 'meta.json').exists():
+            return cls(SemanticIndex.load(directory))
+        embedder = HashedNgramEmbedder()
+        return cls(SemanticIndex.from_exemplars(DEFAULT_EXEMPLARS, embedder), embedder)
+
+    def vote(self, query: str) -> SemanticVote | None:
+        return self.vote_vector(self.embedder.embed(query))
+
+    def vote_vector(self, vector: np.ndarray) -> SemanticVote | None:
+        similarities, labels = self.index.search(vector, k=self.k, nprobe=self.nprobe)
+        if similarities.size == 0 or similarities[0] < self.min_similarity:
+            return None
+
+        # Softmax weighting lets a close exemplar outvote several loose ones.
+        weights = np.exp((similarities - similarities[0]) / self.temperature)
+        totals = np.bincount(labels, weights=weights, minlength=len(self.index.providers))
+        winner = int(np.argmax(totals))
+        total = float(totals.sum())
+        return SemanticVote(
+            provider=self.index.providers[winner],
+            confidence=float(totals[winner]) / total if total else 0.0,
+            similarity=float(similarities[0]),
+        )
+
+
+def _read_exemplars(path: Path) -> dict[str, list[str]]:
+    exemplars: dict[str, list[str]] = {}
+    with path.open(encoding='utf-8') as handle:
+        for line in handle:
+            if line.strip():
+                row = json.loads(line)
+                exemplars.setdefault(row['provider'], []).append(row['text'])
+    return exemplars
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Semantic router index tools')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help='Embed exemplars and write a memory-mappable index')
+    build.add_argument('--out', required=True)
+    build.add_argument('--exemplars', type=Path, help='JSONL with provider/text rows')
+    build.add_argument('--dim', type=int, default=512)
+    build.add_argument('--nlist', type=int, default=None)
+    args = parser.parse_args()
+
+    exemplars = _read_exemplars(args.exemplars) if args.exemplars else DEFAULT_EXEMPLARS
+    index = SemanticIndex.from_exemplars(exemplars, HashedNgramEmbedder(dim=args.dim), nlist=args.nlist)
+    index.save(args.out)
+    print(f'Wrote {len(index)} exemplars in {index.centroids.shape[0]} lists to {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+'''Operational diagnostics for the running server (profiling).'''
@@ -0,0 +1,164 @@
+'''Statistical sampling profiler that emits collapsed stacks for flame-graph tools.
+
+A background thread snapshots `sys._current_frames()` every `interval_s`, so
+the event loop and the worker threads (e.g. `asyncio.to_thread`) are sampled
+without instrumenting them. Nothing runs while no profile is being taken.
+Output lines look like `thread;outer;...;inner <count>`, the format consumed by
+flamegraph.pl, speedscope and similar tools. Frames from `app.core`,
+`app.metrics` and `app.providers` are suffixed with their package, e.g.
+`app.core.router_engine:route [app.core]`.
+
+A profiler created with `task=` is scoped to one request: only event-loop
+samples whose stack contains that task's coroutine are kept, and while the task
+is suspended its await chain is recorded under a trailing `<awaiting>` frame,
+so time spent waiting on providers shows up too. Other requests and worker
+threads (including `asyncio.to_thread` calls made by the request) are left out.
+'''
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from types import CodeType, FrameType
+from typing import Final
+
+MARKED_PACKAGES: Final[tuple[str, ...]] = ('app.core', 'app.metrics', 'app.providers')
+
+
+class ProfilerBusy(Exception):
+    '''Raised when a profile is requested while another one is running.'''
+
+
+class SamplingProfiler:
+    '''One profiling session; `start()` spawns the sampler thread, `stop()` joins it.'''
+
+    def __init__(
+        self,
+        *,
+        interval_s: float = 0.005,
+        max_depth: int = 64,
+        task: asyncio.Task | None = None,
+    ) -> None:
+        self.interval_s = interval_s
+        self.max_depth = max_depth
+        self.samples = 0
+        self._task = task
+        # A scoped profiler is created on the loop thread that runs the task.
+        self._loop_thread_id = threading.get_ident() if task is not None else None
+        self._stacks: Counter[str] = Counter()
+        self._labels: dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        return ''.join(f'{stack} {count}\n' for stack, count in self._stacks.most_common())
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        names: dict[int, str] = {}
+        while not self._stop.wait(self.interval_s):
+            frames = sys._current_frames()
+            if frames.keys() - names.keys():
+                names = {thread.ident: thread.name for thread in threading.enumerate() if thread.ident}
+            if self._task is not None:
+                self._sample_task(frames.get(self._loop_thread_id), names)
+            else:
+                for thread_id, frame in frames.items():
+                    if thread_id != own_id:
+                        self._stacks[self._collapse(names.get(thread_id, str(thread_id)), frame)] += 1
+            self.samples += 1
+
+    def _sample_task(self, frame: FrameType | None, names: dict[int, str]) -> None:
+        coro = self._task.get_coro()
+        root = getattr(coro, 'cr_frame', None)
+        if self._task.done() or root is None:
+            return
+        thread_name = names.get(self._loop_thread_id, 'MainThread')
+        running = frame
+        while running is not None and running is not root:
+            running = running.f_back
+        if running is not None:
+            self._stacks[self._collapse(thread_name, frame)] += 1
+            return
+        # Suspended: a parked coroutine has no f_back, so walk the await chain instead.
+        labels = [thread_name.replace(';', ':').replace(' ', '_')]
+        while coro is not None and len(labels) <= self.max_depth:
+            suspended = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None)
+            if suspended is None:
+                break
+            labels.append(self._label(suspended))
+            coro = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None)
+        labels.append('<awaiting>')
+        self._stacks[';'.join(labels)] += 1
+
+    def _collapse(self, thread_name: str, frame: FrameType | None) -> str:
+        labels: list[str] = []
+        while frame is not None and len(labels) < self.max_depth:
+            labels.append(self._label(frame))
+            frame = frame.f_back
+        labels.append(thread_name.replace(';', ':').replace(' ', '_'))
+        labels.reverse()
+        return ';'.join(labels)
+
+    def _label(self, frame: FrameType) -> str:
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            module = frame.f_globals.get('__name__', '?')
+            label = f'{module}:{code.co_name}'
+            for package in MARKED_PACKAGES:
+                if module == package or module.startswith(package + '.'):
+                    label += f' [{package}]'
+                    break
+            self._labels[code] = label.replace(';', ':')
+        return self._labels[code]
+
+
+class ProfileStore:
+    '''Serialises profiling sessions and keeps the last few per-request results.'''
+
+    def __init__(self, *, keep: int = 20) -> None:
+        self._lock = threading.Lock()
+        self._active: SamplingProfiler | None = None
+        self._results: OrderedDict[str, str] = OrderedDict()
+        self.keep = keep
+
+    def begin(
+        self, *, interval_s: float = 0.005, task: asyncio.Task | None = None
+    ) -> SamplingProfiler:
+        with self._lock:
+            if self._active is not None:
+                raise ProfilerBusy('A profiling session is already running')
+            self._active = SamplingProfiler(interval_s=interval_s, task=task)
+        self._active.start()
+        return self._active
+
+    def end(self, profiler: SamplingProfiler) -> str:
+        profiler.stop()
+        with self._lock:
+            self._active = None
+        return profiler.collapsed()
+
+    def save(self, collapsed: str) -> str:
+        profile_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._results[profile_id] = collapsed
+            while len(self._results) > self.keep:
+                self._results.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> str | None:
+        with self._lock:
+            return self._results.get(profile_id)
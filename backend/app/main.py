@@ -24,18 +24,163 @@ Requisitos:
 - Manejar errores básicos (por ejemplo, query vacía).
 
 No implementes la lógica del router aquí, solo orquestra:
-- Instanciar RouterEngine desde `app.core.router_engine`.
+- Instanciar RouterEngine desde `app.core.router_engine` dentro del lifespan,
+  no al importar el módulo.
 """
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hmac
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import TYPE_CHECKING, AsyncIterator, Literal
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 
 
-from .core.router_engine import RouterEngine, RouterResult
+from .config.settings import get_settings
+from .core.circuit_breaker import BreakerConfig, CircuitBreakerRegistry
+from .core.decision_rules import NoProviderAvailable
+from .core.prompt_compactor import PromptCompactor
+from .core.rate_limiter import RateLimitExceeded, TenantLimits, TenantRateLimiter
+from .core.router_engine import (
+    DEFAULT_PROVIDER_FACTORIES,
+    ProviderFactory,
+    RouterEngine,
+    RouterResult,
+)
+from .diagnostics.sampling_profiler import ProfileStore, ProfilerBusy
+from .metrics.export import export_metrics
 from .metrics.metrics_service import MetricsService
 from .models.schemas import RouteRequest, RouteResponse
+from .providers.batching import BatchingClient
+
+if TYPE_CHECKING:
+    from .core.response_cache import SemanticResponseCache
+    from .core.semantic_router import SemanticRouter
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    settings = get_settings()
+    router_engine = RouterEngine(
+        provider_factories=build_provider_factories(),
+        breakers=build_circuit_breakers(),
+        request_timeout_s=settings.request_timeout_seconds,
+        rate_limiter=build_rate_limiter(),
+        semantic_router=await asyncio.to_thread(build_semantic_router),
+        response_cache=build_response_cache(),
+        compactor=build_prompt_compactor(),
+    )
+    # Loading tiktoken's encoding can hit disk or the network; keep it off the loop.
+    await asyncio.to_thread(router_engine.token_counter.load)
+    metrics_service = MetricsService()
+    await asyncio.to_thread(metrics_service.migrate)
+
+    app.state.router_engine = router_engine
+    app.state.metrics_service = metrics_service
+    app.state.profiles = ProfileStore()
+    app.state.warm_up_error = None
+    # The history preload is not needed to serve /route, so it runs in the background
+    # and only gates /readyz.
+    warm_up = asyncio.create_task(metrics_service.warm_up())
+
+    def on_warm_up_done(task: asyncio.Task[None]) -> None:
+        if task.cancelled() or task.exception() is None:
+            return
+        app.state.warm_up_error = task.exception()
+        logger.error('Metrics warm-up failed', exc_info=task.exception())
+
+    warm_up.add_done_callback(on_warm_up_done)
+    try:
+        yield
+    finally:
+        warm_up.cancel()
+
+
+def build_provider_factories() -> dict[str, ProviderFactory]:
+    settings = get_settings()
+    if not settings.provider_batching_enabled:
+        return dict(DEFAULT_PROVIDER_FACTORIES)
+
+    def batched(factory: ProviderFactory) -> ProviderFactory:
+        return lambda: BatchingClient(
+            factory(),
+            window_ms=settings.provider_batch_window_ms,
+            max_batch_size=settings.provider_batch_max_size,
+        )
+
+    return {name: batched(factory) for name, factory in DEFAULT_PROVIDER_FACTORIES.items()}
+
+
+def build_circuit_breakers() -> CircuitBreakerRegistry | None:
+    settings = get_settings()
+    if not settings.circuit_breaker_enabled:
+        return None
+    return CircuitBreakerRegistry(
+        BreakerConfig(
+            window_size=settings.circuit_breaker_window,
+            min_calls=settings.circuit_breaker_min_calls,
+            failure_rate_threshold=settings.circuit_breaker_failure_rate,
+            open_seconds=settings.circuit_breaker_open_seconds,
+            probe_interval_seconds=settings.circuit_breaker_probe_interval_seconds,
+        )
+    )
+
 
-app = FastAPI(title='MOE Router Backend', version='0.1.0')
+def build_rate_limiter() -> TenantRateLimiter | None:
+    settings = get_settings()
+    if not settings.tenant_rate_limit_enabled:
+        return None
+    limits = TenantLimits(
+        requests_per_second=settings.tenant_requests_per_second,
+        request_burst=settings.tenant_request_burst,
+        usd_per_minute=settings.tenant_usd_per_minute,
+    )
+    return TenantRateLimiter(
+        limits,
+        max_tenants=settings.tenant_max_tracked,
+        idle_seconds=settings.tenant_idle_seconds,
+    )
+
+
+def build_semantic_router() -> 'SemanticRouter | None':
+    settings = get_settings()
+    if not settings.semantic_routing_enabled:
+        return None
+    # Imported lazily: NumPy is only required when the semantic stage is enabled.
+    from .core.semantic_router import SemanticRouter
+
+    return SemanticRouter.from_path_or_defaults(settings.semantic_index_path)
+
+
+def build_response_cache() -> 'SemanticResponseCache | None':
+    settings = get_settings()
+    if not settings.response_cache_enabled:
+        return None
+    from .core.response_cache import SemanticResponseCache
+
+    return SemanticResponseCache(
+        thresholds=settings.response_cache_thresholds,
+        capacity=settings.response_cache_capacity,
+    )
+
+
+def build_prompt_compactor() -> PromptCompactor | None:
+    settings = get_settings()
+    if not settings.prompt_compaction_enabled:
+        return None
+    return PromptCompactor(
+        tier_budgets=settings.prompt_compaction_budgets,
+        min_importance=settings.prompt_compaction_min_importance,
+    )
+
+
+app = FastAPI(title='MOE Router Backend', version='0.1.0', lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -45,8 +190,43 @@ app.add_middleware(
     allow_headers=['*'],
 )
 
-router_engine = RouterEngine()
-metrics_service = MetricsService()
+
+def get_router_engine(request: Request) -> RouterEngine:
+    return request.app.state.router_engine
+
+
+def get_metrics_service(request: Request) -> MetricsService:
+    return request.app.state.metrics_service
+
+
+def get_tenant(
+    x_tenant_id: str | None = Header(default=None),
+    x_api_key: str | None = Header(default=None),
+) -> str:
+    '''Tenant from a configured API key, or from X-Tenant-Id only when it is trusted.'''
+    settings = get_settings()
+    if x_tenant_id and settings.trust_tenant_header:
+        return x_tenant_id
+    if x_api_key:
+        tenant = settings.tenant_api_keys.get(x_api_key)
+        if tenant is not None:
+            return tenant
+    # Unverified identities share one bucket, so rotating them cannot mint new budgets.
+    return 'anonymous'
+
+
+def is_admin(token: str | None) -> bool:
+    expected = get_settings().admin_token
+    return bool(expected) and token is not None and hmac.compare_digest(token, expected)
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail='Admin token required')
+
+
+def get_profiles(request: Request) -> ProfileStore:
+    return request.app.state.profiles
 
 
 @app.get('/healthz')
@@ -54,10 +234,202 @@ async def health_check() -> dict[str, str]:
     return {'status': 'ok'}
 
 
+@app.get('/readyz')
+async def readiness_check(
+    request: Request,
+    metrics_service: MetricsService = Depends(get_metrics_service),
+) -> JSONResponse:
+    error = request.app.state.warm_up_error
+    if error is not None:
+        return JSONResponse(
+            status_code=503, content={'status': 'failed', 'error': f'{type(error).__name__}: {error}'}
+        )
+    if not metrics_service.ready:
+        return JSONResponse(status_code=503, content={'status': 'starting'})
+    return JSONResponse(content={'status': 'ready'})
+
+
+@app.get('/cache/stats')
+async def cache_stats(
+    router_engine: RouterEngine = Depends(get_router_engine),
+) -> dict[str, object]:
+    if router_engine.response_cache is None:
+        return {'enabled': False}
+    return {'enabled': True, **router_engine.response_cache.stats.to_dict()}
+
+
+@app.get('/compaction/stats')
+async def compaction_stats(
+    router_engine: RouterEngine = Depends(get_router_engine),
+) -> dict[str, object]:
+    if router_engine.compactor is None:
+        return {'enabled': False}
+    return {'enabled': True, **router_engine.compactor.stats.to_dict()}
+
+
+@app.get('/providers/batching')
+async def batching_stats(
+    router_engine: RouterEngine = Depends(get_router_engine),
+) -> dict[str, object]:
+    return {
+        name: client.stats.to_dict()
+        for name, client in router_engine.providers.items()
+        if isinstance(client, BatchingClient)
+    }
+
+
+@app.get('/providers/breakers')
+async def breaker_stats(
+    router_engine: RouterEngine = Depends(get_router_engine),
+) -> dict[str, object]:
+    if router_engine.breakers is None:
+        return {'enabled': False}
+    return {'enabled': True, **router_engine.breakers.to_dict()}
+
+
+@app.get('/metrics/recent')
+async def recent_metrics(
+    limit: int = Query(20, ge=1, le=500),
+    metrics_service: MetricsService = Depends(get_metrics_service),
+) -> list[dict[str, object]]:
+    return metrics_service.recent_as_dicts(limit)
+
+
+@app.get('/metrics/stream')
+async def stream_metrics(
+    last_event_id: int | None = Header(default=None),
+    since_id: int | None = Query(default=None, ge=0),
+    metrics_service: MetricsService = Depends(get_metrics_service),
+) -> StreamingResponse:
+    resume_from = last_event_id if last_event_id is not None else since_id
+    return StreamingResponse(
+        metrics_service.feed.stream(resume_from),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@app.get('/metrics/page')
+async def metrics_page(
+    after_id: int = Query(0, ge=0),
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(500, ge=1, le=5000),
+    metrics_service: MetricsService = Depends(get_metrics_service),
+) -> dict[str, object]:
+    records = await asyncio.to_thread(
+        metrics_service.storage.fetch_page,
+        after_id=after_id,
+        since=since,
+        until=until,
+        limit=limit,
+    )
+    next_after_id = records[-1].id if len(records) == limit else None
+    return {'items': [record.to_dict() for record in records], 'next_after_id': next_after_id}
+
+
+@app.get('/metrics/export')
+async def export_metrics_history(
+    format: Literal['ndjson', 'csv'] = 'ndjson',
+    after_id: int = Query(0, ge=0),
+    since: datetime | None = None,
+    until: datetime | None = None,
+    metrics_service: MetricsService = Depends(get_metrics_service),
+) -> StreamingResponse:
+    media_type = 'text/csv' if format == 'csv' else 'application/x-ndjson'
+    return StreamingResponse(
+        export_metrics(
+            metrics_service.storage, fmt=format, after_id=after_id, since=since, until=until
+        ),
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename=metrics.{format}'},
+    )
+
+
+@app.post('/admin/profile', dependencies=[Depends(require_admin)])
+async def profile_server(
+    seconds: float = Query(10.0, gt=0, le=120),
+    interval_ms: float = Query(5.0, ge=1, le=100),
+    profiles: ProfileStore = Depends(get_profiles),
+) -> PlainTextResponse:
+    '''Sample every thread for `seconds` and return collapsed stacks.'''
+    try:
+        profiler = profiles.begin(interval_s=interval_ms / 1000)
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        collapsed = await asyncio.to_thread(profiles.end, profiler)
+    return PlainTextResponse(collapsed)
+
+
+@app.get('/admin/profiles/{profile_id}', dependencies=[Depends(require_admin)])
+async def get_request_profile(
+    profile_id: str,
+    profiles: ProfileStore = Depends(get_profiles),
+) -> PlainTextResponse:
+    collapsed = profiles.get(profile_id)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail='Unknown profile id')
+    return PlainTextResponse(collapsed)
+
+
 @app.post('/route', response_model=RouteResponse)
-async def route(payload: RouteRequest) -> RouteResponse:
+async def route(
+    payload: RouteRequest,
+    response: Response,
+    router_engine: RouterEngine = Depends(get_router_engine),
+    metrics_service: MetricsService = Depends(get_metrics_service),
+    tenant: str = Depends(get_tenant),
+    profiles: ProfileStore = Depends(get_profiles),
+    x_profile: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> RouteResponse:
+    if not x_profile:
+        return await route_and_record(payload, router_engine, metrics_service, tenant)
+
+    # Per-request profiling: only this request's task is sampled and the collapsed
+    # stacks are fetched afterwards through /admin/profiles/{X-Profile-Id}.
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail='Admin token required to profile')
+    try:
+        profiler = profiles.begin(interval_s=0.001, task=asyncio.current_task())
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    failure: HTTPException | None = None
+    try:
+        return await route_and_record(payload, router_engine, metrics_service, tenant)
+    except HTTPException as exc:
+        failure = exc
+        raise
+    finally:
+        collapsed = await asyncio.to_thread(profiles.end, profiler)
+        profile_id = profiles.save(collapsed)
+        response.headers['X-Profile-Id'] = profile_id
+        # `response` is discarded when the handler raises, so errors carry the id themselves.
+        if failure is not None:
+            failure.headers = {**(failure.headers or {}), 'X-Profile-Id': profile_id}
+
+
+async def route_and_record(
+    payload: RouteRequest,
+    router_engine: RouterEngine,
+    metrics_service: MetricsService,
+    tenant: str,
+) -> RouteResponse:
     try:
-        result: RouterResult = await router_engine.route(payload)
+        result: RouterResult = await router_engine.route(payload, tenant=tenant)
+    except RateLimitExceeded as exc:
+        raise HTTPException(
+            status_code=429,
+            detail=str(exc),
+            headers={'Retry-After': str(max(1, round(exc.retry_after_s)))},
+        ) from exc
+    except NoProviderAvailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    except TimeoutError as exc:
+        raise HTTPException(status_code=504, detail='Provider timed out') from exc
     except KeyError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
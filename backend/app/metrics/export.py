@@ -0,0 +1,68 @@
+'''Streaming NDJSON/CSV export of the metrics history in fixed-size keyset chunks.'''
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Literal
+
+from .storage import COLUMNS, MetricsStorage
+
+ExportFormat = Literal['ndjson', 'csv']
+
+
+async def export_metrics(
+    storage: MetricsStorage,
+    *,
+    fmt: ExportFormat = 'ndjson',
+    after_id: int = 0,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    chunk_size: int = 1000,
+) -> AsyncIterator[str]:
+    '''Yield the export one chunk at a time; memory does not grow with the row count.
+
+    Every chunk is a separate short read run in a worker thread, so the event
+    loop and concurrent writers from `/route` are never blocked by the export.
+    '''
+    if fmt == 'csv':
+        yield _csv_lines([COLUMNS])
+
+    cursor = after_id
+    until_id = None
+    if since is not None or until is not None:
+        # Resolve the window to ids once; every chunk then keysets on the rowid alone.
+        bounds = await asyncio.to_thread(storage.id_range, since=since, until=until)
+        if bounds is None:
+            return
+        cursor = max(cursor, bounds[0] - 1)
+        until_id = bounds[1]
+    while True:
+        rows = await asyncio.to_thread(
+            storage.fetch_page_rows,
+            after_id=cursor,
+            since=since,
+            until=until,
+            until_id=until_id,
+            limit=chunk_size,
+        )
+        if not rows:
+            return
+        cursor = rows[-1][0]
+        if fmt == 'csv':
+            yield _csv_lines(rows)
+        else:
+            yield ''.join(
+                json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + '\n' for row in rows
+            )
+        if len(rows) < chunk_size:
+            return
+
+
+def _csv_lines(rows: list[tuple]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
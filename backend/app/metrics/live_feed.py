@@ -0,0 +1,195 @@
+'''Push feed of newly recorded metrics for live dashboards (Server-Sent Events).
+
+Publishing is O(1): a record is appended to a shared ring buffer and waiting
+subscribers are woken. Each subscriber only keeps a cursor (the last id it
+sent) and pulls batches from the ring on its own task, so the `/route` path
+never iterates over subscribers. A subscriber that falls more than `max_lag`
+records behind is sent a `reset` event and disconnected; it can reconnect
+with `Last-Event-ID` to resume.
+
+A resume id older than the ring (after a restart, or after the records were
+evicted) is backfilled from `MetricsStorage` by id before streaming from the
+ring. Without a storage, or past `max_backfill` records, the client gets a
+`reset` and must reload history.
+'''
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import deque
+from typing import TYPE_CHECKING, AsyncIterator, Deque, Final, Iterable
+
+if TYPE_CHECKING:
+    from .metrics_service import MetricRecord
+    from .storage import MetricsStorage
+
+COLUMNS: Final[tuple[str, ...]] = (
+    'id',
+    'provider',
+    'model',
+    'latency_ms',
+    'cost_usd',
+    'score',
+    'created_at_ms',
+)
+
+
+def _row(record: 'MetricRecord') -> list[object]:
+    return [
+        record.id,
+        record.provider,
+        record.model,
+        record.latency_ms,
+        record.cost_usd,
+        record.score,
+        int(record.created_at.timestamp() * 1000),
+    ]
+
+
+def _frame(event: str, data: object, last_id: int | None = None) -> str:
+    lines = []
+    if last_id is not None:
+        lines.append(f'id: {last_id}')
+    lines.append(f'event: {event}')
+    lines.append('data: ' + json.dumps(data, separators=(',', ':')))
+    return '\n'.join(lines) + '\n\n'
+
+
+class MetricsFeed:
+    '''Shared ring of recent records plus a wake-up signal for subscribers.'''
+
+    def __init__(
+        self,
+        *,
+        buffer_size: int = 2048,
+        max_lag: int = 512,
+        batch_interval_s: float = 0.25,
+        max_batch: int = 200,
+        heartbeat_s: float = 15.0,
+        storage: 'MetricsStorage | None' = None,
+        max_backfill: int = 10_000,
+    ) -> None:
+        self._ring: Deque['MetricRecord'] = deque(maxlen=buffer_size)
+        self._storage = storage
+        self.max_backfill = max_backfill
+        self.max_lag = min(max_lag, buffer_size)
+        self.batch_interval_s = batch_interval_s
+        self.max_batch = max_batch
+        self.heartbeat_s = heartbeat_s
+        self._wakeup = asyncio.Event()
+        self.subscribers = 0
+        self.dropped = 0
+
+    @property
+    def last_id(self) -> int | None:
+        return self._ring[-1].id if self._ring else None
+
+    def seed(self, records: Iterable['MetricRecord']) -> None:
+        '''Prepend persisted history older than anything published; call on the event loop.'''
+        oldest = self._oldest_id()
+        older = [
+            record
+            for record in records
+            if record.id is not None and (oldest is None or record.id < oldest)
+        ]
+        if older:
+            combined = [*older, *self._ring]
+            self._ring.clear()
+            self._ring.extend(combined[-self._ring.maxlen :])
+
+    def publish(self, record: 'MetricRecord') -> None:
+        '''Called from the event loop right after a record is persisted.'''
+        self._ring.append(record)
+        wakeup, self._wakeup = self._wakeup, asyncio.Event()
+        wakeup.set()
+
+    async def stream(self, last_event_id: int | None = None) -> AsyncIterator[str]:
+        self.subscribers += 1
+        try:
+            cursor = self.last_id if last_event_id is None else last_event_id
+            yield _frame('hello', {'columns': COLUMNS}, cursor)
+            first = True
+            while True:
+                # An empty ring only means 'behind' right after (re)start; later it is just idle.
+                if cursor is not None and self._is_gap(cursor, ring_empty_is_gap=first):
+                    if self._storage is None:
+                        self.dropped += 1
+                        yield _frame('reset', {'reason': 'resume_id_too_old'})
+                        return
+                    backfilled = 0
+                    async for batch in self._backfill(cursor):
+                        backfilled += len(batch)
+                        if backfilled > self.max_backfill:
+                            self.dropped += 1
+                            yield _frame('reset', {'reason': 'resume_id_too_old'})
+                            return
+                        cursor = batch[-1].id
+                        yield _frame('metrics', [_row(record) for record in batch], cursor)
+                    oldest = self._oldest_id()
+                    if oldest is not None:
+                        # Storage has nothing more below the ring (ids can skip), so do not re-query.
+                        cursor = max(cursor, oldest - 1)
+                first = False
+
+                pending = self._after(cursor)
+                if len(pending) > self.max_lag:
+                    self.dropped += 1
+                    yield _frame('reset', {'reason': 'slow_consumer'})
+                    return
+
+                if pending:
+                    for start in range(0, len(pending), self.max_batch):
+                        batch = pending[start : start + self.max_batch]
+                        cursor = batch[-1].id
+                        yield _frame('metrics', [_row(record) for record in batch], cursor)
+                    # Let more records accumulate so fan-out sends fewer, larger frames.
+                    await asyncio.sleep(self.batch_interval_s)
+                    continue
+
+                wakeup = self._wakeup
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=self.heartbeat_s)
+                except TimeoutError:
+                    yield ': ping\n\n'
+        finally:
+            self.subscribers -= 1
+
+    def _oldest_id(self) -> int | None:
+        return self._ring[0].id if self._ring else None
+
+    def _is_gap(self, cursor: int, *, ring_empty_is_gap: bool) -> bool:
+        '''Whether records after `cursor` may be missing from the ring.'''
+        oldest = self._oldest_id()
+        if oldest is None:
+            return ring_empty_is_gap
+        return cursor + 1 < oldest
+
+    async def _backfill(self, cursor: int) -> AsyncIterator[list['MetricRecord']]:
+        '''Pages of persisted records after `cursor` that are older than the ring.'''
+        assert self._storage is not None
+        while True:
+            page = await asyncio.to_thread(
+                self._storage.fetch_page, after_id=cursor, limit=self.max_batch
+            )
+            oldest = self._oldest_id()
+            if oldest is not None:
+                page = [record for record in page if record.id is not None and record.id < oldest]
+            if not page:
+                return
+            yield page
+            cursor = page[-1].id
+
+    def _after(self, cursor: int | None) -> list['MetricRecord']:
+        if cursor is None:
+            return list(self._ring)
+        # Subscribers sit near the tail, so walk backwards from the newest record.
+        newer: list['MetricRecord'] = []
+        for record in reversed(self._ring):
+            if record.id is not None and record.id <= cursor:
+                break
+            newer.append(record)
+            if len(newer) > self.max_lag:
+                break
+        newer.reverse()
+        return newer
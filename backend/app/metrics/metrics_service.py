@@ -21,6 +21,7 @@ Para simplificar:
 
 from __future__ import annotations
 
+import asyncio
 from collections import deque
 from dataclasses import dataclass
 from datetime import datetime, timezone
@@ -29,6 +30,7 @@ from typing import Deque, List
 
 from ..config.settings import get_settings
 from ..core.router_engine import RouterResult
+from .live_feed import MetricsFeed
 from .storage import MetricsStorage
 
 
@@ -41,9 +43,12 @@ class MetricRecord:
     score: float
     rationale: str
     created_at: datetime
+    id: int | None = None
 
     @classmethod
-    def from_result(cls, result: RouterResult) -> 'MetricRecord':
+    def from_result(
+        cls, result: RouterResult, *, created_at: datetime | None = None
+    ) -> 'MetricRecord':
         return cls(
             provider=result.provider,
             model=result.chosen_model,
@@ -51,11 +56,12 @@ class MetricRecord:
             cost_usd=result.cost_usd,
             score=result.quality_score,
             rationale=result.routing_explanation,
-            created_at=datetime.now(timezone.utc),
+            created_at=created_at or datetime.now(timezone.utc),
         )
 
     def to_dict(self) -> dict[str, object]:
         return {
+            'id': self.id,
             'provider': self.provider,
             'model': self.model,
             'latency_ms': self.latency_ms,
@@ -69,7 +75,13 @@ class MetricRecord:
 class MetricsService:
     '''Coordinates conversion of router responses into persisted metrics.'''
 
-    def __init__(self, storage: MetricsStorage | None = None, *, history_limit: int = 50) -> None:
+    def __init__(
+        self,
+        storage: MetricsStorage | None = None,
+        *,
+        history_limit: int = 50,
+        feed: MetricsFeed | None = None,
+    ) -> None:
         if storage is None:
             settings = get_settings()
             storage = MetricsStorage(settings.sqlite_path)
@@ -78,12 +90,31 @@ class MetricsService:
         self.history_limit = max(1, history_limit)
         self._history: Deque[MetricRecord] = deque(maxlen=self.history_limit)
         self._lock = Lock()
-        self._preload_cache()
-
-    def record_from_result(self, result: RouterResult) -> MetricRecord:
-        record = MetricRecord.from_result(result)
+        self._warmed = False
+        self.feed = feed or MetricsFeed(storage=storage)
+
+    @property
+    def ready(self) -> bool:
+        return self._warmed
+
+    def migrate(self) -> None:
+        self.storage.migrate()
+
+    async def warm_up(self) -> None:
+        '''Fill the in-memory history from SQLite in a worker thread, then seed the feed.'''
+        cached = await asyncio.to_thread(self._preload_cache)
+        # The feed ring belongs to the event loop, so it is only seeded from here.
+        self.feed.seed(cached)
+        self._warmed = True
+
+    def record_from_result(
+        self, result: RouterResult, *, created_at: datetime | None = None
+    ) -> MetricRecord:
+        '''Persist and publish `result`; `created_at` lets simulations stamp virtual time.'''
+        record = MetricRecord.from_result(result, created_at=created_at)
+        record.id = self.storage.save(record)
         self._append_to_cache(record)
-        self.storage.save(record)
+        self.feed.publish(record)
         return record
 
     def recent(self, limit: int = 20) -> List[MetricRecord]:
@@ -99,10 +130,16 @@ class MetricsService:
     def recent_as_dicts(self, limit: int = 20) -> List[dict[str, object]]:
         return [record.to_dict() for record in self.recent(limit)]
 
-    def _preload_cache(self) -> None:
+    def _preload_cache(self) -> list[MetricRecord]:
         cached = self.storage.fetch_last(self.history_limit)
-        for record in cached:
-            self._history.append(record)
+        with self._lock:
+            # Records appended while the preload was running are already persisted
+            # unless they were saved after the fetch; keep those at the tail.
+            pending = [record for record in self._history if record not in cached]
+            self._history.clear()
+            self._history.extend(cached)
+            self._history.extend(pending)
+        return cached
 
     def _append_to_cache(self, record: MetricRecord) -> None:
         with self._lock:
@@ -1,13 +1,25 @@
 from __future__ import annotations
 
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, TYPE_CHECKING
+from typing import Final, List, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .metrics_service import MetricRecord
 
+COLUMNS: Final[tuple[str, ...]] = (
+    'id',
+    'provider',
+    'model',
+    'latency_ms',
+    'cost_usd',
+    'score',
+    'rationale',
+    'created_at',
+)
+_SELECT_COLUMNS: Final[str] = ', '.join(COLUMNS)
+
 
 class MetricsStorage:
     '''SQLite storage facade for router metrics.'''
@@ -15,33 +27,50 @@ class MetricsStorage:
     def __init__(self, db_path: str | Path | None = None) -> None:
         default_path = Path(__file__).resolve().parent / 'metrics.sqlite'
         self.db_path = Path(db_path) if db_path else default_path
-        self._ensure_schema()
+        self._migrated = False
+
+    def migrate(self) -> None:
+        '''Create the database file and schema.
 
-    def _ensure_schema(self) -> None:
+        The app calls this at startup so the first request does not pay for it;
+        storages used elsewhere (scripts, tests) create the schema on first use.
+        '''
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        with self._connect() as connection:
-            connection.execute(
-                '''
-                CREATE TABLE IF NOT EXISTS metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    provider TEXT NOT NULL,
-                    model TEXT NOT NULL,
-                    latency_ms INTEGER NOT NULL,
-                    cost_usd REAL NOT NULL,
-                    score REAL NOT NULL,
-                    rationale TEXT NOT NULL,
-                    created_at TEXT NOT NULL
-                )
-                '''
+        with sqlite3.connect(self.db_path) as connection:
+            self._create_schema(connection)
+        self._migrated = True
+
+    @staticmethod
+    def _create_schema(connection: sqlite3.Connection) -> None:
+        connection.execute(
+            '''
+            CREATE TABLE IF NOT EXISTS metrics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                latency_ms INTEGER NOT NULL,
+                cost_usd REAL NOT NULL,
+                score REAL NOT NULL,
+                rationale TEXT NOT NULL,
+                created_at TEXT NOT NULL
             )
-            connection.commit()
+            '''
+        )
+        connection.execute(
+            'CREATE INDEX IF NOT EXISTS idx_metrics_created_at ON metrics (created_at)'
+        )
+        # WAL lets long exports read while /route keeps writing.
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.commit()
 
     def _connect(self) -> sqlite3.Connection:
+        if not self._migrated:
+            self.migrate()
         return sqlite3.connect(self.db_path)
 
-    def save(self, record: 'MetricRecord') -> None:
+    def save(self, record: 'MetricRecord') -> int:
         with self._connect() as connection:
-            connection.execute(
+            cursor = connection.execute(
                 '''
                 INSERT INTO metrics (provider, model, latency_ms, cost_usd, score, rationale, created_at)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
@@ -57,33 +86,127 @@ class MetricsStorage:
                 ),
             )
             connection.commit()
+        return int(cursor.lastrowid)
 
     def fetch_last(self, limit: int = 20) -> List['MetricRecord']:
         with self._connect() as connection:
-            cursor = connection.execute(
-                '''
-                SELECT provider, model, latency_ms, cost_usd, score, rationale, created_at
+            rows = connection.execute(
+                f'''
+                SELECT {_SELECT_COLUMNS} FROM (
+                    SELECT {_SELECT_COLUMNS} FROM metrics ORDER BY id DESC LIMIT ?
+                )
+                ORDER BY id ASC
+                ''',
+                (limit,),
+            ).fetchall()
+        return [self._to_record(row) for row in rows]
+
+    def fetch_page(
+        self,
+        *,
+        after_id: int = 0,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: int = 500,
+    ) -> List['MetricRecord']:
+        '''Keyset page ordered by id: pass the last id of a page as `after_id` for the next.'''
+        rows = self.fetch_page_rows(after_id=after_id, since=since, until=until, limit=limit)
+        return [self._to_record(row) for row in rows]
+
+    def fetch_page_rows(
+        self,
+        *,
+        after_id: int = 0,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        until_id: int | None = None,
+        limit: int = 500,
+    ) -> list[tuple]:
+        '''Raw rows in `COLUMNS` order; each call is one short read transaction.
+
+        Pages always walk the rowid: the time bounds are applied as `+created_at`
+        filters so the planner never switches to the created_at index, which would
+        need a temp sort per page and turn a chunked export quadratic. Without an
+        explicit `until_id`, a time window is first resolved to its id range so the
+        walk starts at the window instead of the first row of the table.
+        '''
+        if until_id is None and (since is not None or until is not None):
+            bounds = self.id_range(since=since, until=until)
+            if bounds is None:
+                return []
+            after_id = max(after_id, bounds[0] - 1)
+            until_id = bounds[1]
+
+        clauses = ['id > ?']
+        params: list[object] = [after_id]
+        if until_id is not None:
+            clauses.append('id <= ?')
+            params.append(until_id)
+        clauses.extend(self._time_clauses(since, until, params))
+        params.append(limit)
+
+        with self._connect() as connection:
+            return connection.execute(
+                f'''
+                SELECT {_SELECT_COLUMNS}
                 FROM metrics
-                ORDER BY id DESC
+                WHERE {' AND '.join(clauses)}
+                ORDER BY id ASC
                 LIMIT ?
                 ''',
-                (limit,),
-            )
-            rows = cursor.fetchall()
+                params,
+            ).fetchall()
+
+    def id_range(
+        self, *, since: datetime | None = None, until: datetime | None = None
+    ) -> tuple[int, int] | None:
+        '''Smallest and largest id inside the time window, or None when it is empty.'''
+        params: list[object] = []
+        # Here the created_at index is the right plan: one range scan for the whole window.
+        clauses = self._time_clauses(since, until, params, column='created_at')
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._connect() as connection:
+            low, high = connection.execute(
+                f'SELECT MIN(id), MAX(id) FROM metrics {where}', params
+            ).fetchone()
+        return None if low is None else (low, high)
+
+    def _time_clauses(
+        self,
+        since: datetime | None,
+        until: datetime | None,
+        params: list[object],
+        *,
+        column: str = '+created_at',
+    ) -> list[str]:
+        clauses = []
+        if since is not None:
+            clauses.append(f'{column} >= ?')
+            params.append(self._as_utc(since).isoformat())
+        if until is not None:
+            clauses.append(f'{column} < ?')
+            params.append(self._as_utc(until).isoformat())
+        return clauses
 
+    @staticmethod
+    def _as_utc(value: datetime) -> datetime:
+        # created_at is stored as UTC ISO text, so bounds must use the same format to compare.
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
+    @staticmethod
+    def _to_record(row: tuple) -> 'MetricRecord':
         from .metrics_service import MetricRecord
 
-        results: List[MetricRecord] = []
-        for provider, model, latency_ms, cost_usd, score, rationale, created_at in rows:
-            results.append(
-                MetricRecord(
-                    provider=provider,
-                    model=model,
-                    latency_ms=latency_ms,
-                    cost_usd=cost_usd,
-                    score=score,
-                    rationale=rationale,
-                    created_at=datetime.fromisoformat(created_at),
-                )
-            )
-        return list(reversed(results))
+        row_id, provider, model, latency_ms, cost_usd, score, rationale, created_at = row
+        return MetricRecord(
+            provider=provider,
+            model=model,
+            latency_ms=latency_ms,
+            cost_usd=cost_usd,
+            score=score,
+            rationale=rationale,
+            created_at=datetime.fromisoformat(created_at),
+            id=row_id,
+        )
@@ -30,6 +30,9 @@ class RouteResponse(BaseModel):
     cost_usd: float = Field(..., ge=0.0)
     quality_score: float = Field(..., ge=0.0, le=1.0)
     routing_explanation: str = Field(..., min_length=1)
+    cache_hit: bool = False
+    input_tokens_saved: int = Field(0, ge=0, description='Tokens de entrada ahorrados al compactar')
+    cost_saved_usd: float = Field(0.0, ge=0.0, description='Costo estimado ahorrado al compactar')
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -42,3 +45,7 @@ class RouterRequest(BaseModel):
     priority: Literal['low', 'normal', 'high'] = 'normal'
     max_tokens: int | None = Field(None, ge=1, le=4096)
     temperature: float = Field(0.2, ge=0.0, le=2.0)
+    input_tokens: dict[str, int] = Field(
+        default_factory=dict,
+        description='Tokens del prompt por familia de tokenizer, contados una vez por request',
+    )
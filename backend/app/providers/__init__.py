@@ -1,13 +1,20 @@
 '''Provider clients that talk to external LLM APIs (mocked for now).'''
 
 from .base_client import LlmProviderClient
+from .batching import BatchingClient
 from .gemini_flash_image_client import GeminiFlashImageClient
 from .gemini_pro_client import GeminiProClient
 from .openai_client import OpenAIClient
+from .stub_client import StubClient
+from .tokenizers import TokenCounter, get_token_counter
 
 __all__ = [
     'LlmProviderClient',
+    'BatchingClient',
     'GeminiFlashImageClient',
     'GeminiProClient',
     'OpenAIClient',
+    'StubClient',
+    'TokenCounter',
+    'get_token_counter',
 ]
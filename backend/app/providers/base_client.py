@@ -27,14 +27,36 @@ from ..models.schemas import RouterRequest
 
 
 class LlmProviderClient(ABC):
-    '''Lightweight async client interface for LLM providers.'''
+    '''Lightweight async client interface for LLM providers.
+
+    The demo clients only declare `simulated_latency_ms` and `_render`; the
+    simulated single and batched calls are shared here.
+    '''
 
     name: str
     default_model: str
+    simulated_latency_ms: int = 40
+    # Extra simulated time per item when several payloads share one batched call.
+    batch_item_latency_ms: int = 2
 
-    @abstractmethod
     async def generate(self, payload: RouterRequest, *, model: str | None = None) -> str:
         '''Return the provider response for the given payload.'''
+        await self._simulate_latency(self.simulated_latency_ms)
+        return self._render(payload, model or self.default_model)
+
+    async def generate_batch(
+        self, payloads: list[RouterRequest], *, model: str | None = None
+    ) -> list[str]:
+        '''Return one response per payload from a single simulated round trip.'''
+        await self._simulate_latency(
+            self.simulated_latency_ms + self.batch_item_latency_ms * len(payloads)
+        )
+        target_model = model or self.default_model
+        return [self._render(payload, target_model) for payload in payloads]
+
+    @abstractmethod
+    def _render(self, payload: RouterRequest, target_model: str) -> str:
+        '''Format the response text for `payload`.'''
 
     async def _simulate_latency(self, milliseconds: int = 40) -> None:
         await asyncio.sleep(milliseconds / 1000)
@@ -0,0 +1,133 @@
+'''Optional micro-batching wrapper around an `LlmProviderClient`.
+
+Calls for the same model that arrive within `window_ms` of the first pending
+call (or until `max_batch_size` is reached) are sent as a single
+`generate_batch` call, and each waiting coroutine receives its own result.
+'''
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from ..models.schemas import RouterRequest
+from .base_client import LlmProviderClient
+
+
+@dataclass(slots=True)
+class BatchingStats:
+    batches: int = 0
+    items: int = 0
+    batch_sizes: Counter[int] = field(default_factory=Counter)
+    queue_delay_total_ms: float = 0.0
+    queue_delay_max_ms: float = 0.0
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+            'batch_sizes': dict(sorted(self.batch_sizes.items())),
+            'queue_delay_mean_ms': round(self.queue_delay_total_ms / self.items, 3)
+            if self.items
+            else 0.0,
+            'queue_delay_max_ms': round(self.queue_delay_max_ms, 3),
+        }
+
+
+@dataclass(slots=True)
+class _PendingCall:
+    payload: RouterRequest
+    future: asyncio.Future[str]
+    enqueued_at: float
+
+
+class BatchingClient(LlmProviderClient):
+    '''Collects concurrent `generate` calls per model into batched provider calls.'''
+
+    def __init__(
+        self,
+        client: LlmProviderClient,
+        *,
+        window_ms: float = 5.0,
+        max_batch_size: int = 16,
+    ) -> None:
+        self.client = client
+        self.name = client.name
+        self.default_model = client.default_model
+        self.window_ms = window_ms
+        self.max_batch_size = max(1, max_batch_size)
+        self.stats = BatchingStats()
+        self._pending: dict[str, list[_PendingCall]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._in_flight: set[asyncio.Task[None]] = set()
+
+    async def generate(self, payload: RouterRequest, *, model: str | None = None) -> str:
+        target_model = model or self.default_model
+        loop = asyncio.get_running_loop()
+        call = _PendingCall(payload, loop.create_future(), time.perf_counter())
+        queue = self._pending.setdefault(target_model, [])
+        queue.append(call)
+
+        if len(queue) >= self.max_batch_size:
+            self._flush(target_model)
+        elif len(queue) == 1:
+            self._timers[target_model] = loop.call_later(
+                self.window_ms / 1000, self._flush, target_model
+            )
+        return await call.future
+
+    async def generate_batch(
+        self, payloads: list[RouterRequest], *, model: str | None = None
+    ) -> list[str]:
+        return await self.client.generate_batch(payloads, model=model)
+
+    def _render(self, payload: RouterRequest, target_model: str) -> str:
+        return self.client._render(payload, target_model)
+
+    def _flush(self, model: str) -> None:
+        timer = self._timers.pop(model, None)
+        if timer is not None:
+            timer.cancel()
+        calls = self._pending.pop(model, [])
+        calls = [call for call in calls if not call.future.cancelled()]
+        if not calls:
+            return
+
+        now = time.perf_counter()
+        for call in calls:
+            delay_ms = (now - call.enqueued_at) * 1000
+            self.stats.queue_delay_total_ms += delay_ms
+            self.stats.queue_delay_max_ms = max(self.stats.queue_delay_max_ms, delay_ms)
+        self.stats.batches += 1
+        self.stats.items += len(calls)
+        self.stats.batch_sizes[len(calls)] += 1
+        task = asyncio.get_running_loop().create_task(self._dispatch(model, calls))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, model: str, calls: list[_PendingCall]) -> None:
+        try:
+            outputs = await self.client.generate_batch(
+                [call.payload for call in calls], model=model
+            )
+            if len(outputs) != len(calls):
+                raise RuntimeError(
+                    f'{self.name} returned {len(outputs)} outputs for {len(calls)} payloads'
+                )
+        except Exception as exc:
+            for call in calls:
+                if not call.future.done():
+                    call.future.set_exception(exc)
+            return
+        except BaseException:
+            # Cancelled (e.g. at shutdown): waiters must not hang on futures nobody resolves.
+            for call in calls:
+                call.future.cancel()
+            raise
+
+        for call, output in zip(calls, outputs):
+            if not call.future.done():
+                call.future.set_result(output)
@@ -7,9 +7,8 @@ from .base_client import LlmProviderClient
 class OpenAIClient(LlmProviderClient):
     name = 'openai'
     default_model = 'gpt-4o-mini'
+    simulated_latency_ms = 60
 
-    async def generate(self, payload: RouterRequest, *, model: str | None = None) -> str:
-        await self._simulate_latency(60)
-        target_model = model or self.default_model
+    def _render(self, payload: RouterRequest, target_model: str) -> str:
         prompt = self._short_prompt(payload.query)
         return f'[{self.name}:{target_model}] response for {prompt}'
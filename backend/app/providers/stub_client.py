@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from ..models.schemas import RouterRequest
+from .base_client import LlmProviderClient
+
+
+class StubClient(LlmProviderClient):
+    '''Instant, offline client used when replaying or simulating traffic.'''
+
+    def __init__(self, name: str, default_model: str) -> None:
+        self.name = name
+        self.default_model = default_model
+
+    async def generate(self, payload: RouterRequest, *, model: str | None = None) -> str:
+        return self._render(payload, model or self.default_model)
+
+    async def generate_batch(
+        self, payloads: list[RouterRequest], *, model: str | None = None
+    ) -> list[str]:
+        target_model = model or self.default_model
+        return [self._render(payload, target_model) for payload in payloads]
+
+    def _render(self, payload: RouterRequest, target_model: str) -> str:
+        return f'[stub:{self.name}:{target_model}]'
@@ -0,0 +1,167 @@
+'''Local token counting per model family with a bounded LRU cache.
+
+`TokenCounter.count(text, model)` resolves the model family from the model
+name (`gpt-*` -> `gpt`, `gemini-*` -> `gemini`) and returns the family
+tokenizer's count. Counts from exact tokenizers are cached by a hash of the
+text, so repeated prompts are O(1) and the cache never holds the prompts
+themselves; the approximation is cheaper to recompute than to cache.
+
+The `gpt` family uses `tiktoken` when it is installed (`pip install -e .[tokenizer]`);
+otherwise, and for Gemini, a BPE-like approximation is used that charges words
+by their UTF-8 length (so long and non-ASCII words cost more) plus fractions of
+a token per punctuation mark and digit. It only uses bytes primitives that run
+in C, so an uncached count costs about as much as `str.split`.
+
+Routing estimates need one count per request, not one per family:
+`count_families` counts once with the default family and scales the result by
+`FAMILY_TOKEN_RATIOS`. `load()` builds the tokenizers up front; with tiktoken
+that may read or download its BPE file, so call it off the event loop.
+'''
+
+from __future__ import annotations
+
+import string
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+from typing import Callable, Final, Iterable, Protocol
+
+_SYMBOLS: Final[bytes] = (string.punctuation + string.digits).encode()
+
+
+class Tokenizer(Protocol):
+    # False when a count is as cheap as an LRU lookup, so caching it would only add work.
+    cacheable: bool
+
+    def count(self, text: str) -> int: ...
+
+
+class ApproxBpeTokenizer:
+    '''Dependency-free token estimate close to byte-level BPE on prose and code.'''
+
+    cacheable = False
+
+    def __init__(self, chars_per_token: float = 4.0) -> None:
+        self.chars_per_token = chars_per_token
+
+    def count(self, text: str) -> int:
+        data = text.encode()
+        words = data.translate(None, _SYMBOLS)
+        newlines = words.count(b'\n')
+        letters = len(words) - words.count(b' ') - newlines
+        tokens = (
+            # Each word costs its length over chars_per_token rounded up, which adds
+            # half a token per word on average.
+            round(letters / self.chars_per_token + len(words.split()) / 2)
+            # Punctuation and digits (BPE groups up to three) cost a fraction each.
+            + (len(data) - len(words)) * 2 // 3
+            # A single space merges into the next word; a line break is a token of its own.
+            + newlines
+        )
+        return max(1, tokens)
+
+
+class TiktokenTokenizer:
+    '''Exact counts for OpenAI models through the optional `tiktoken` package.'''
+
+    cacheable = True
+
+    def __init__(self, encoding: str = 'o200k_base') -> None:
+        import tiktoken
+
+        self._encoding = tiktoken.get_encoding(encoding)
+
+    def count(self, text: str) -> int:
+        return max(1, len(self._encoding.encode(text, disallowed_special=())))
+
+
+def _gpt_tokenizer() -> Tokenizer:
+    try:
+        return TiktokenTokenizer()
+    except Exception:  # tiktoken missing or its encoding files cannot be loaded offline
+        return ApproxBpeTokenizer(chars_per_token=4.2)
+
+
+FAMILY_TOKENIZERS: Final[dict[str, Callable[[], Tokenizer]]] = {
+    'gpt': _gpt_tokenizer,
+    'gemini': lambda: ApproxBpeTokenizer(chars_per_token=4.0),
+}
+DEFAULT_FAMILY: Final[str] = 'gpt'
+# Tokens in each family per token of the default family, for per-request estimates.
+FAMILY_TOKEN_RATIOS: Final[dict[str, float]] = {'gpt': 1.0, 'gemini': 4.2 / 4.0}
+
+
+class TokenCounter:
+    '''Counts tokens per model family, caching results by text hash.'''
+
+    def __init__(
+        self,
+        factories: dict[str, Callable[[], Tokenizer]] | None = None,
+        *,
+        ratios: dict[str, float] | None = None,
+        cache_size: int = 65_536,
+    ) -> None:
+        self._factories = dict(factories or FAMILY_TOKENIZERS)
+        self._ratios = dict(ratios or FAMILY_TOKEN_RATIOS)
+        self._tokenizers: dict[str, Tokenizer] = {}
+        self._cache: OrderedDict[tuple[str, int], int] = OrderedDict()
+        self.cache_size = max(1, cache_size)
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    def family_for(self, model: str | None) -> str:
+        if model:
+            prefix = model.split('-', 1)[0].lower()
+            if prefix in self._factories:
+                return prefix
+        return DEFAULT_FAMILY
+
+    def count(self, text: str, model: str | None = None) -> int:
+        family = self.family_for(model)
+        tokenizer = self._tokenizer(family)
+        if not tokenizer.cacheable:
+            return tokenizer.count(text)
+        # str hashes are cached on the string object, so repeated lookups for the
+        # same query object do not rehash it; 64 bits make collisions negligible.
+        key = (family, hash(text))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+
+        tokens = tokenizer.count(text)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = tokens
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def count_families(self, text: str, models: Iterable[str]) -> dict[str, int]:
+        '''Estimate `text` for every family used by `models` from one default-family count.'''
+        tokens = self.count(text)
+        counts = {DEFAULT_FAMILY: tokens}
+        for model in models:
+            family = self.family_for(model)
+            if family not in counts:
+                counts[family] = max(1, round(tokens * self._ratios.get(family, 1.0)))
+        return counts
+
+    def load(self) -> None:
+        '''Build every family tokenizer now instead of on the first request.'''
+        for family in self._factories:
+            self._tokenizer(family)
+
+    def _tokenizer(self, family: str) -> Tokenizer:
+        tokenizer = self._tokenizers.get(family)
+        if tokenizer is None:
+            tokenizer = self._tokenizers.setdefault(family, self._factories[family]())
+        return tokenizer
+
+
+@lru_cache
+def get_token_counter() -> TokenCounter:
+    return TokenCounter()
@@ -0,0 +1 @@
+'''Offline tools that replay or simulate traffic through the router.'''
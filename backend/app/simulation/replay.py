@@ -0,0 +1,299 @@
+'''Replay logged `RouteRequest`s through `RouterEngine` to compare routing policies.
+
+Each input line is a JSON object with the `RouteRequest` fields. The file is
+streamed in chunks that are routed by a process pool with stub providers, so
+memory stays bounded no matter how large the log is; every chunk returns a
+small aggregate that is merged in the parent process.
+
+Usage (desde `backend/`):
+    python -m app.simulation.replay traffic.jsonl \\
+        --candidate mypolicies:StricterRules --workers 8
+
+A policy is an import path `module:attribute` to a `DecisionRules` subclass
+or to a zero-argument factory returning one.
+'''
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterator
+
+from pydantic import ValidationError
+
+from ..core.decision_rules import DecisionRules
+from ..core.router_engine import RouterEngine
+from ..models.schemas import RouteRequest
+from ..providers.stub_client import StubClient
+
+DEFAULT_POLICY = 'app.core.decision_rules:DecisionRules'
+LATENCY_BUCKET_MS = 5
+LATENCY_BUCKETS = 2001  # 0..10s in 5 ms bins; the last bin collects the tail.
+MAX_DIFF_SAMPLES = 20
+
+
+@dataclass(slots=True)
+class PolicyStats:
+    '''Mergeable aggregate of one policy over a slice of traffic.'''
+
+    routed: int = 0
+    cost_usd: float = 0.0
+    providers: Counter[str] = field(default_factory=Counter)
+    latency_histogram: list[int] = field(default_factory=lambda: [0] * LATENCY_BUCKETS)
+    latency_sum_ms: float = 0.0
+
+    def add(self, provider: str, latency_ms: float, cost_usd: float) -> None:
+        self.routed += 1
+        self.cost_usd += cost_usd
+        self.providers[provider] += 1
+        self.latency_sum_ms += latency_ms
+        bucket = min(LATENCY_BUCKETS - 1, int(latency_ms // LATENCY_BUCKET_MS))
+        self.latency_histogram[bucket] += 1
+
+    def merge(self, other: 'PolicyStats') -> None:
+        self.routed += other.routed
+        self.cost_usd += other.cost_usd
+        self.providers.update(other.providers)
+        self.latency_sum_ms += other.latency_sum_ms
+        for bucket, count in enumerate(other.latency_histogram):
+            self.latency_histogram[bucket] += count
+
+    def percentile(self, fraction: float) -> float:
+        if not self.routed:
+            return 0.0
+        target = fraction * self.routed
+        seen = 0
+        for bucket, count in enumerate(self.latency_histogram):
+            seen += count
+            if seen >= target:
+                return float((bucket + 1) * LATENCY_BUCKET_MS)
+        return float(LATENCY_BUCKETS * LATENCY_BUCKET_MS)
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            'routed': self.routed,
+            'provider_share': {
+                provider: round(count / self.routed, 4)
+                for provider, count in self.providers.most_common()
+            }
+            if self.routed
+            else {},
+            'total_cost_usd': round(self.cost_usd, 5),
+            'latency_ms': {
+                'mean': round(self.latency_sum_ms / self.routed, 2) if self.routed else 0.0,
+                'p50': self.percentile(0.5),
+                'p90': self.percentile(0.9),
+                'p99': self.percentile(0.99),
+            },
+        }
+
+
+@dataclass(slots=True)
+class ReplayReport:
+    rows: int = 0
+    skipped: int = 0
+    baseline: PolicyStats = field(default_factory=PolicyStats)
+    candidate: PolicyStats | None = None
+    changed: int = 0
+    transitions: Counter[tuple[str, str]] = field(default_factory=Counter)
+    diff_samples: list[dict[str, str]] = field(default_factory=list)
+
+    def merge(self, other: 'ReplayReport') -> None:
+        self.rows += other.rows
+        self.skipped += other.skipped
+        self.baseline.merge(other.baseline)
+        if other.candidate is not None:
+            if self.candidate is None:
+                self.candidate = PolicyStats()
+            self.candidate.merge(other.candidate)
+        self.changed += other.changed
+        self.transitions.update(other.transitions)
+        room = MAX_DIFF_SAMPLES - len(self.diff_samples)
+        self.diff_samples.extend(other.diff_samples[:room])
+
+    def to_dict(self) -> dict[str, object]:
+        report: dict[str, object] = {
+            'rows': self.rows,
+            'skipped': self.skipped,
+            'baseline': self.baseline.to_dict(),
+        }
+        if self.candidate is not None:
+            routed = self.baseline.routed
+            report['candidate'] = self.candidate.to_dict()
+            report['diff'] = {
+                'changed': self.changed,
+                'changed_share': round(self.changed / routed, 4) if routed else 0.0,
+                'cost_delta_usd': round(self.candidate.cost_usd - self.baseline.cost_usd, 5),
+                'transitions': {
+                    f'{before}->{after}': count
+                    for (before, after), count in self.transitions.most_common()
+                },
+                'samples': self.diff_samples,
+            }
+        return report
+
+
+def load_policy(path: str) -> Callable[[], DecisionRules]:
+    module_name, _, attribute = path.partition(':')
+    if not attribute:
+        raise ValueError(f'Policy {path!r} must look like module:attribute')
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def _stub_providers(rules: DecisionRules) -> dict[str, StubClient]:
+    return {key: StubClient(key, config['model']) for key, config in rules.catalog.items()}
+
+
+def _build_engine(policy: str | None) -> RouterEngine | None:
+    if policy is None:
+        return None
+    rules = load_policy(policy)()
+    return RouterEngine(_stub_providers(rules), rules=rules)
+
+
+_WORKER_ENGINES: tuple[RouterEngine, RouterEngine | None] | None = None
+
+
+def _init_worker(baseline: str, candidate: str | None) -> None:
+    global _WORKER_ENGINES
+    baseline_engine = _build_engine(baseline)
+    assert baseline_engine is not None
+    _WORKER_ENGINES = (baseline_engine, _build_engine(candidate))
+
+
+def _replay_chunk(lines: list[str]) -> ReplayReport:
+    assert _WORKER_ENGINES is not None, 'worker not initialised'
+    return asyncio.run(_replay_lines(*_WORKER_ENGINES, lines))
+
+
+async def _replay_lines(
+    baseline: RouterEngine, candidate: RouterEngine | None, lines: list[str]
+) -> ReplayReport:
+    report = ReplayReport(candidate=PolicyStats() if candidate is not None else None)
+    for line in lines:
+        if not line.strip():
+            continue
+        report.rows += 1
+        try:
+            payload = RouteRequest.model_validate_json(line)
+        except ValidationError:
+            report.skipped += 1
+            continue
+
+        before = await baseline.route(payload)
+        report.baseline.add(before.provider, before.latency_ms, before.cost_usd)
+        if candidate is None or report.candidate is None:
+            continue
+
+        after = await candidate.route(payload)
+        report.candidate.add(after.provider, after.latency_ms, after.cost_usd)
+        if (before.provider, before.chosen_model) != (after.provider, after.chosen_model):
+            report.changed += 1
+            report.transitions[(before.provider, after.provider)] += 1
+            if len(report.diff_samples) < MAX_DIFF_SAMPLES:
+                report.diff_samples.append(
+                    {
+                        'user_query': payload.user_query[:120],
+                        'baseline': before.chosen_model,
+                        'candidate': after.chosen_model,
+                    }
+                )
+    return report
+
+
+def _chunks(path: Path, chunk_size: int) -> Iterator[list[str]]:
+    with path.open(encoding='utf-8') as handle:
+        while chunk := list(islice(handle, chunk_size)):
+            yield chunk
+
+
+def replay(
+    path: Path,
+    *,
+    baseline: str = DEFAULT_POLICY,
+    candidate: str | None = None,
+    workers: int | None = None,
+    chunk_size: int = 5_000,
+) -> ReplayReport:
+    '''Stream `path` through the pool keeping at most 2 chunks per worker in flight.'''
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    total = ReplayReport(candidate=PolicyStats() if candidate else None)
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(baseline, candidate)
+    ) as pool:
+        pending: set[Future[ReplayReport]] = set()
+        for chunk in _chunks(path, chunk_size):
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    total.merge(future.result())
+            pending.add(pool.submit(_replay_chunk, chunk))
+        for future in pending:
+            total.merge(future.result())
+    return total
+
+
+def _format_policy(title: str, stats: dict[str, object]) -> list[str]:
+    latency = stats['latency_ms']
+    assert isinstance(latency, dict)
+    lines = [
+        f'{title}: {stats["routed"]} rutas, costo total ${stats["total_cost_usd"]}',
+        f'  latencia ms -> media {latency["mean"]}, p50 {latency["p50"]}, '
+        f'p90 {latency["p90"]}, p99 {latency["p99"]}',
+    ]
+    share = stats['provider_share']
+    assert isinstance(share, dict)
+    lines.extend(f'  {provider:<20} {fraction:7.2%}' for provider, fraction in share.items())
+    return lines
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description='Replay RouteRequest logs through RouterEngine')
+    parser.add_argument('log', type=Path, help='JSONL file with one RouteRequest per line')
+    parser.add_argument('--baseline', default=DEFAULT_POLICY)
+    parser.add_argument('--candidate', default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=5_000)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args(argv)
+
+    report = replay(
+        args.log,
+        baseline=args.baseline,
+        candidate=args.candidate,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+    ).to_dict()
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return
+
+    print(f'Filas: {report["rows"]} (omitidas: {report["skipped"]})')
+    print('\n'.join(_format_policy('Baseline', report['baseline'])))
+    if 'candidate' in report:
+        print('\n'.join(_format_policy('Candidata', report['candidate'])))
+        diff = report['diff']
+        assert isinstance(diff, dict)
+        print(
+            f'Decisiones distintas: {diff["changed"]} ({diff["changed_share"]:.2%}), '
+            f'delta de costo ${diff["cost_delta_usd"]}'
+        )
+        for transition, count in diff['transitions'].items():
+            print(f'  {transition:<32} {count}')
+
+
+if __name__ == '__main__':
+    main()
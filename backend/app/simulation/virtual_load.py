@@ -0,0 +1,508 @@
+'''Discrete-event load simulation of `RouterEngine` on a virtual clock.
+
+The unchanged router stack runs on `VirtualTimeEventLoop`: this includes rules,
+the tenant rate limiter, circuit breakers, `wait_for` timeouts and
+`MetricsService`. The loop's clock only moves when every task is waiting, and
+then it jumps straight to the next timer. An hour of traffic therefore takes as
+long as the routing work itself, not an hour.
+
+Providers are `SimulatedProviderClient`s. Each one draws its latency from a
+lognormal body with a Pareto tail, fails with a configurable error rate and
+serves at most `concurrency` calls at once. Up to `queue_limit` further calls
+wait in a queue; calls beyond that are rejected as overloaded. Arrivals follow a
+Poisson process over synthetic payloads or a JSONL log of `RouteRequest`s. The
+log uses the same format as `app.simulation.replay`.
+
+Usage (desde `backend/`):
+    python -m app.simulation.virtual_load --rate 200 --duration 3600 \\
+        --profiles perfiles.json --tenants 50
+
+`perfiles.json` overrides `ProviderProfile` fields per provider, e.g.
+`{"openai": {"median_ms": 500, "tail_prob": 0.05, "concurrency": 32}}`.
+'''
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+import zlib
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field, fields, replace
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Final
+
+from ..core.circuit_breaker import BreakerConfig, CircuitBreakerRegistry
+from ..core.decision_rules import NoProviderAvailable
+from ..core.rate_limiter import RateLimitExceeded, TenantLimits, TenantRateLimiter
+from ..core.router_engine import RouterEngine
+from ..metrics.metrics_service import MetricRecord, MetricsService
+from ..metrics.storage import MetricsStorage
+from ..models.schemas import RouteRequest, RouterRequest
+from ..providers.base_client import LlmProviderClient
+from .replay import DEFAULT_POLICY, load_policy
+
+SIM_EPOCH: Final[datetime] = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+SYNTHETIC_QUERIES: Final[tuple[str, ...]] = (
+    'Resume en tres puntos el estado del proyecto de facturacion.',
+    'Compara Postgres y DynamoDB para un sistema de reservas con picos de trafico.',
+    'Traduce al ingles: el pedido llegara el martes por la manana.',
+    'Explica por que la latencia p99 de la API se duplico despues del despliegue.',
+    'Dibuja un logotipo minimalista para una cafeteria de especialidad.',
+    'Escribe una funcion en Python que valide un IBAN.',
+    'Analiza la estrategia de precios de la competencia y propone un plan a 6 meses.',
+    'What is the capital of Australia?',
+)
+
+
+class ProviderOverloaded(Exception):
+    '''Raised when a simulated provider's queue is full.'''
+
+
+class SimulatedProviderError(Exception):
+    '''A simulated 5xx from the provider.'''
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    '''Event loop whose clock jumps to the next timer instead of sleeping until it.'''
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._virtual_now = 0.0
+        self._selector = _VirtualSelector(self._selector, self)
+
+    def time(self) -> float:
+        return self._virtual_now
+
+    def advance(self, seconds: float) -> None:
+        self._virtual_now += seconds
+
+
+class _VirtualSelector:
+    '''Polls the real selector without blocking and turns the wait into a clock jump.'''
+
+    def __init__(self, selector, loop: VirtualTimeEventLoop) -> None:
+        self._selector = selector
+        self._loop = loop
+
+    def select(self, timeout: float | None = None):
+        events = self._selector.select(0)
+        if events:
+            return events
+        if timeout is None:
+            # Nothing is scheduled and nothing is ready: no simulated event can ever fire.
+            raise RuntimeError('Virtual-time simulation stalled with no pending timers')
+        self._loop.advance(timeout)
+        return []
+
+    def __getattr__(self, name: str):
+        return getattr(self._selector, name)
+
+
+@dataclass(frozen=True, slots=True)
+class ProviderProfile:
+    '''Latency, error and capacity model for one simulated provider.'''
+
+    median_ms: float = 800.0
+    sigma: float = 0.5
+    tail_prob: float = 0.02
+    tail_alpha: float = 1.6
+    error_rate: float = 0.005
+    concurrency: int = 64
+    queue_limit: int = 512
+
+
+DEFAULT_PROFILES: Final[dict[str, ProviderProfile]] = {
+    'openai': ProviderProfile(median_ms=650, sigma=0.45, concurrency=96),
+    'gemini_pro': ProviderProfile(
+        median_ms=1400, sigma=0.55, tail_prob=0.03, error_rate=0.01, concurrency=96
+    ),
+    'gemini_flash_image': ProviderProfile(
+        median_ms=2600, sigma=0.4, tail_prob=0.02, error_rate=0.01, concurrency=64
+    ),
+}
+
+
+@dataclass(slots=True)
+class ProviderUsage:
+    calls: int = 0
+    errors: int = 0
+    overloaded: int = 0
+    busy_s: float = 0.0
+    queue_wait_s: float = 0.0
+    peak_in_flight: int = 0
+    peak_queue: int = 0
+
+    def to_dict(self, concurrency: int, elapsed_s: float) -> dict[str, object]:
+        capacity_s = concurrency * elapsed_s
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'overloaded': self.overloaded,
+            'utilization': round(self.busy_s / capacity_s, 4) if capacity_s else 0.0,
+            'queue_wait_mean_ms': round(self.queue_wait_s / self.calls * 1000, 2)
+            if self.calls
+            else 0.0,
+            'peak_in_flight': self.peak_in_flight,
+            'peak_queue': self.peak_queue,
+        }
+
+
+class SimulatedProviderClient(LlmProviderClient):
+    '''Provider whose latency and failures are drawn from `ProviderProfile`.'''
+
+    def __init__(
+        self, name: str, default_model: str, profile: ProviderProfile, *, seed: int = 0
+    ) -> None:
+        self.name = name
+        self.default_model = default_model
+        self.profile = profile
+        self.usage = ProviderUsage()
+        # Seeded per provider so adding a provider does not reshuffle the others' draws.
+        self._rng = random.Random(seed ^ zlib.crc32(name.encode()))
+        self._slots = asyncio.Semaphore(profile.concurrency)
+        self._in_flight = 0
+        self._waiting = 0
+
+    async def generate(self, payload: RouterRequest, *, model: str | None = None) -> str:
+        profile = self.profile
+        usage = self.usage
+        if self._waiting >= profile.queue_limit:
+            usage.overloaded += 1
+            raise ProviderOverloaded(f'{self.name} queue is full')
+
+        loop = asyncio.get_running_loop()
+        enqueued_at = loop.time()
+        self._waiting += 1
+        usage.peak_queue = max(usage.peak_queue, self._waiting)
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        started = loop.time()
+        self._in_flight += 1
+        usage.calls += 1
+        usage.queue_wait_s += started - enqueued_at
+        usage.peak_in_flight = max(usage.peak_in_flight, self._in_flight)
+        try:
+            await asyncio.sleep(self._draw_latency_s())
+            if self._rng.random() < profile.error_rate:
+                usage.errors += 1
+                raise SimulatedProviderError(f'{self.name} returned 503')
+        finally:
+            # Also reached when the router's timeout cancels the call mid-flight.
+            self._in_flight -= 1
+            usage.busy_s += loop.time() - started
+            self._slots.release()
+        return self._render(payload, model or self.default_model)
+
+    async def generate_batch(
+        self, payloads: list[RouterRequest], *, model: str | None = None
+    ) -> list[str]:
+        # Each item takes its own slot and latency draw, as with separate calls.
+        results = await asyncio.gather(
+            *(self.generate(payload, model=model) for payload in payloads)
+        )
+        return list(results)
+
+    def _render(self, payload: RouterRequest, target_model: str) -> str:
+        return f'[sim:{self.name}:{target_model}]'
+
+    def _draw_latency_s(self) -> float:
+        profile = self.profile
+        latency_ms = self._rng.lognormvariate(math.log(profile.median_ms), profile.sigma)
+        if self._rng.random() < profile.tail_prob:
+            latency_ms *= self._rng.paretovariate(profile.tail_alpha)
+        return latency_ms / 1000
+
+
+class _InMemoryStorage(MetricsStorage):
+    '''Assigns ids without touching SQLite; the service keeps its bounded history.'''
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.saved = 0
+
+    def migrate(self) -> None:
+        return None
+
+    def save(self, record: MetricRecord) -> int:
+        self.saved += 1
+        return self.saved
+
+    def fetch_last(self, limit: int = 20) -> list[MetricRecord]:
+        return []
+
+
+@dataclass(slots=True)
+class SimulationConfig:
+    rate_per_s: float = 100.0
+    duration_s: float = 600.0
+    policy: str = DEFAULT_POLICY
+    profiles: dict[str, ProviderProfile] = field(default_factory=lambda: dict(DEFAULT_PROFILES))
+    request_timeout_s: float | None = 30.0
+    breakers: bool = True
+    rate_limits: TenantLimits | None = None
+    tenants: int = 1
+    payloads: list[RouteRequest] | None = None
+    seed: int = 7
+
+
+@dataclass(slots=True)
+class SimulationReport:
+    arrivals: int = 0
+    completed: int = 0
+    failures: Counter[str] = field(default_factory=Counter)
+    providers: Counter[str] = field(default_factory=Counter)
+    cost_usd: float = 0.0
+    latencies_ms: array = field(default_factory=lambda: array('d'))
+    virtual_s: float = 0.0
+    wall_s: float = 0.0
+    usage: dict[str, dict[str, object]] = field(default_factory=dict)
+    metrics_recorded: int = 0
+
+    def to_dict(self) -> dict[str, object]:
+        latencies = sorted(self.latencies_ms)
+
+        def percentile(fraction: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))], 2)
+
+        return {
+            'arrivals': self.arrivals,
+            'completed': self.completed,
+            'failures': dict(self.failures.most_common()),
+            'provider_share': {
+                provider: round(count / self.completed, 4)
+                for provider, count in self.providers.most_common()
+            }
+            if self.completed
+            else {},
+            'total_cost_usd': round(self.cost_usd, 5),
+            'latency_ms': {
+                'mean': round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+                'p50': percentile(0.5),
+                'p90': percentile(0.9),
+                'p99': percentile(0.99),
+                'p999': percentile(0.999),
+                'max': round(latencies[-1], 2) if latencies else 0.0,
+            },
+            'providers': self.usage,
+            'metrics_recorded': self.metrics_recorded,
+            'virtual_s': round(self.virtual_s, 3),
+            'wall_s': round(self.wall_s, 3),
+            'speedup': round(self.virtual_s / self.wall_s, 1) if self.wall_s else 0.0,
+        }
+
+
+def simulate(config: SimulationConfig) -> SimulationReport:
+    '''Run one simulation on a fresh virtual-time loop.'''
+    loop = VirtualTimeEventLoop()
+    started = time.perf_counter()
+    try:
+        report = loop.run_until_complete(_simulate(config))
+    finally:
+        loop.close()
+    report.wall_s = time.perf_counter() - started
+    return report
+
+
+async def _simulate(config: SimulationConfig) -> SimulationReport:
+    loop = asyncio.get_running_loop()
+    rules = load_policy(config.policy)()
+    clients = {
+        key: SimulatedProviderClient(
+            key,
+            catalog_entry['model'],
+            config.profiles.get(key, ProviderProfile()),
+            seed=config.seed,
+        )
+        for key, catalog_entry in rules.catalog.items()
+    }
+    engine = RouterEngine(
+        clients,
+        rules=rules,
+        request_timeout_s=config.request_timeout_s,
+        breakers=CircuitBreakerRegistry(BreakerConfig(), clock=loop.time)
+        if config.breakers
+        else None,
+        rate_limiter=TenantRateLimiter(config.rate_limits, clock=loop.time)
+        if config.rate_limits is not None
+        else None,
+    )
+    storage = _InMemoryStorage()
+    metrics = MetricsService(storage)
+    report = SimulationReport()
+    rng = random.Random(config.seed)
+    payloads = config.payloads or _synthetic_payloads(rng)
+
+    tasks: set[asyncio.Task[None]] = set()
+    start = loop.time()
+    end = start + config.duration_s
+    arrival = start
+    while config.rate_per_s > 0:
+        arrival += rng.expovariate(config.rate_per_s)
+        if arrival >= end:
+            break
+        await asyncio.sleep(arrival - loop.time())
+        payload = payloads[report.arrivals % len(payloads)]
+        tenant = f'tenant-{rng.randrange(config.tenants)}'
+        report.arrivals += 1
+        task = loop.create_task(_route_one(engine, metrics, payload, tenant, report))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+    report.virtual_s = loop.time() - start
+    report.metrics_recorded = storage.saved
+    report.usage = {
+        key: client.usage.to_dict(client.profile.concurrency, report.virtual_s)
+        for key, client in clients.items()
+    }
+    return report
+
+
+async def _route_one(
+    engine: RouterEngine,
+    metrics: MetricsService,
+    payload: RouteRequest,
+    tenant: str,
+    report: SimulationReport,
+) -> None:
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        result = await engine.route(payload, tenant=tenant)
+    except RateLimitExceeded:
+        report.failures['rate_limited'] += 1
+        return
+    except NoProviderAvailable:
+        report.failures['no_provider'] += 1
+        return
+    except TimeoutError:
+        report.failures['timeout'] += 1
+        return
+    except ProviderOverloaded:
+        report.failures['overloaded'] += 1
+        return
+    except SimulatedProviderError:
+        report.failures['provider_error'] += 1
+        return
+
+    finished = loop.time()
+    metrics.record_from_result(result, created_at=SIM_EPOCH + timedelta(seconds=finished))
+    report.completed += 1
+    report.providers[result.provider] += 1
+    report.cost_usd += result.cost_usd
+    report.latencies_ms.append((finished - started) * 1000)
+
+
+def _synthetic_payloads(rng: random.Random, count: int = 512) -> list[RouteRequest]:
+    return [
+        RouteRequest(
+            user_query=rng.choice(SYNTHETIC_QUERIES),
+            importance_precision=round(rng.random(), 2),
+            importance_latency=round(rng.random(), 2),
+            importance_cost=round(rng.random(), 2),
+        )
+        for _ in range(count)
+    ]
+
+
+def load_payloads(path: Path) -> list[RouteRequest]:
+    with path.open(encoding='utf-8') as handle:
+        return [RouteRequest.model_validate_json(line) for line in handle if line.strip()]
+
+
+def load_profiles(path: Path) -> dict[str, ProviderProfile]:
+    overrides = json.loads(path.read_text(encoding='utf-8'))
+    known = {item.name for item in fields(ProviderProfile)}
+    profiles = dict(DEFAULT_PROFILES)
+    for provider, values in overrides.items():
+        unknown = set(values) - known
+        if unknown:
+            raise ValueError(f'Unknown profile fields for {provider!r}: {sorted(unknown)}')
+        profiles[provider] = replace(profiles.get(provider, ProviderProfile()), **values)
+    return profiles
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description='Simulate router load on a virtual clock')
+    parser.add_argument('--rate', type=float, default=100.0, help='Arrivals per virtual second')
+    parser.add_argument('--duration', type=float, default=600.0, help='Virtual seconds')
+    parser.add_argument('--log', type=Path, default=None, help='JSONL of RouteRequests to cycle')
+    parser.add_argument('--profiles', type=Path, default=None)
+    parser.add_argument('--policy', default=DEFAULT_POLICY)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--no-breakers', action='store_true')
+    parser.add_argument('--tenants', type=int, default=1)
+    parser.add_argument('--tenant-rps', type=float, default=None, help='Enable the rate limiter')
+    parser.add_argument('--tenant-usd-per-minute', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args(argv)
+
+    rate_limits = None
+    if args.tenant_rps is not None:
+        rate_limits = TenantLimits(
+            requests_per_second=args.tenant_rps,
+            request_burst=args.tenant_rps * 2,
+            usd_per_minute=args.tenant_usd_per_minute,
+        )
+    report = simulate(
+        SimulationConfig(
+            rate_per_s=args.rate,
+            duration_s=args.duration,
+            policy=args.policy,
+            profiles=load_profiles(args.profiles) if args.profiles else dict(DEFAULT_PROFILES),
+            request_timeout_s=args.timeout,
+            breakers=not args.no_breakers,
+            rate_limits=rate_limits,
+            tenants=max(1, args.tenants),
+            payloads=load_payloads(args.log) if args.log else None,
+            seed=args.seed,
+        )
+    ).to_dict()
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return
+
+    latency = report['latency_ms']
+    assert isinstance(latency, dict)
+    print(
+        f'Llegadas: {report["arrivals"]}, completadas: {report["completed"]}, '
+        f'costo total ${report["total_cost_usd"]}'
+    )
+    print(
+        f'Tiempo virtual {report["virtual_s"]} s en {report["wall_s"]} s reales '
+        f'(x{report["speedup"]})'
+    )
+    print(
+        f'Latencia ms -> media {latency["mean"]}, p50 {latency["p50"]}, p90 {latency["p90"]}, '
+        f'p99 {latency["p99"]}, p99.9 {latency["p999"]}'
+    )
+    for kind, count in report['failures'].items():
+        print(f'  fallo {kind:<16} {count}')
+    providers = report['providers']
+    assert isinstance(providers, dict)
+    for provider, usage in providers.items():
+        print(
+            f'  {provider:<20} llamadas {usage["calls"]:>8}  utilizacion {usage["utilization"]:7.2%}'
+            f'  espera media {usage["queue_wait_mean_ms"]} ms  pico en vuelo {usage["peak_in_flight"]}'
+        )
+
+
+if __name__ == '__main__':
+    main()
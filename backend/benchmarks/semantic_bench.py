@@ -0,0 +1,70 @@
+'''Measure semantic-router vote latency on a large, memory-mapped exemplar index.
+
+Usage (desde `backend/`): `python -m benchmarks.semantic_bench --exemplars 50000`
+'''
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.semantic_router import HashedNgramEmbedder, SemanticIndex, SemanticRouter
+
+QUERIES = (
+    'compara dos enfoques para escalar la base de datos',
+    'hola, me ayudas con una frase corta?',
+    'dibuja un mapa ilustrado de la ciudad',
+    'what would happen to margins if we doubled prices',
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--exemplars', type=int, default=50_000)
+    parser.add_argument('--dim', type=int, default=512)
+    parser.add_argument('--iterations', type=int, default=2_000)
+    args = parser.parse_args()
+
+    # Random unit vectors stand in for embedded exemplars; search cost only
+    # depends on the number of rows and their dimension.
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.exemplars, args.dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    labels = rng.integers(0, 3, size=args.exemplars)
+    providers = ['gemini_flash_image', 'gemini_pro', 'openai']
+
+    started = time.perf_counter()
+    index = SemanticIndex.build(vectors, labels, providers)
+    build_s = time.perf_counter() - started
+
+    embedder = HashedNgramEmbedder(dim=args.dim)
+    with tempfile.TemporaryDirectory() as tmp:
+        index.save(tmp)
+        router = SemanticRouter(SemanticIndex.load(tmp), embedder, min_similarity=-1.0)
+        query_vectors = [embedder.embed(query) for query in QUERIES]
+
+        search_us: list[float] = []
+        for i in range(args.iterations):
+            vector = query_vectors[i % len(query_vectors)]
+            started = time.perf_counter()
+            router.vote_vector(vector)
+            search_us.append((time.perf_counter() - started) * 1e6)
+
+        embed_us: list[float] = []
+        for i in range(args.iterations):
+            started = time.perf_counter()
+            embedder.embed(QUERIES[i % len(QUERIES)])
+            embed_us.append((time.perf_counter() - started) * 1e6)
+
+    search_us.sort()
+    print(f'exemplars: {len(index)}  lists: {index.centroids.shape[0]}  build: {build_s:.1f} s')
+    print(f'vote  p50: {statistics.median(search_us):7.1f} us  p99: {search_us[int(len(search_us) * 0.99)]:7.1f} us')
+    print(f'embed p50: {statistics.median(embed_us):7.1f} us')
+
+
+if __name__ == '__main__':
+    main()
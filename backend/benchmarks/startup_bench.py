@@ -0,0 +1,70 @@
+'''Measure import-to-first-request time of the FastAPI app in fresh interpreters.
+
+Usage (desde `backend/`): `python -m benchmarks.startup_bench --runs 5`
+'''
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+CHILD_SCRIPT = '''
+import json, time
+t0 = time.perf_counter()
+from app.main import app
+t_import = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    t_startup = time.perf_counter()
+    response = client.post('/route', json={
+        'user_query': 'Explica la diferencia entre latencia y throughput',
+        'importance_precision': 0.5,
+        'importance_latency': 0.5,
+        'importance_cost': 0.5,
+    })
+    response.raise_for_status()
+    t_first = time.perf_counter()
+print(json.dumps({
+    'import_ms': (t_import - t0) * 1000,
+    'startup_ms': (t_startup - t_import) * 1000,
+    'first_request_ms': (t_first - t_startup) * 1000,
+    'total_ms': (t_first - t0) * 1000,
+}))
+'''
+
+
+def run_once(backend_dir: Path, sqlite_path: Path) -> dict[str, float]:
+    env = dict(os.environ, SQLITE_PATH=str(sqlite_path))
+    completed = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT],
+        cwd=backend_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    backend_dir = Path(__file__).resolve().parent.parent
+    with tempfile.TemporaryDirectory() as tmp:
+        samples = [run_once(backend_dir, Path(tmp) / 'bench.sqlite') for _ in range(args.runs)]
+
+    for key in ('import_ms', 'startup_ms', 'first_request_ms', 'total_ms'):
+        values = [sample[key] for sample in samples]
+        print(f'{key:>18}: median {statistics.median(values):8.1f}  max {max(values):8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+'''Compare tokenizer-backed estimation against the old word-count heuristic.
+
+Reports raw counting speed (cold and cached) and end-to-end `RouterEngine.route`
+throughput with stub providers, where the word heuristic is plugged in as a
+`TokenCounter` so that only the counting strategy differs. Routed prompts are
+unique by default, so every count misses the LRU cache as it would on real
+traffic; `--repeated` cycles the small corpus instead.
+
+Usage (desde `backend/`): `python -m benchmarks.tokenizer_bench --rounds 30`
+'''
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import statistics
+import time
+
+from app.core.decision_rules import DecisionRules
+from app.core.router_engine import RouterEngine
+from app.models.schemas import RouteRequest
+from app.providers.stub_client import StubClient
+from app.providers.tokenizers import TokenCounter
+
+CORPUS = (
+    'Explica por que la latencia de nuestra API aumento despues del despliegue de ayer.',
+    'Compare the trade-offs between optimistic and pessimistic locking in Postgres.',
+    'def merge(a, b):\n    return sorted({**a, **b}.items(), key=lambda kv: kv[1])[:10]',
+    'Dibuja un logotipo minimalista para una cafeteria de especialidad en Medellin.',
+    'Resume el siguiente contrato: ' + 'clausula de confidencialidad y penalizaciones, ' * 40,
+    'SELECT user_id, COUNT(*) FROM events WHERE created_at > now() - interval \'7 days\' GROUP BY 1;',
+)
+
+
+class WordHeuristicCounter(TokenCounter):
+    '''The previous estimate (`len(query.split()) * 4` words-to-tokens) behind the new interface.'''
+
+    def count(self, text: str, model: str | None = None) -> int:
+        return max(1, len(text.split()) * 4 // 3)
+
+
+def time_counts(counter: TokenCounter, texts: list[str]) -> float:
+    started = time.perf_counter()
+    for text in texts:
+        counter.count(text, 'gpt-4o-mini')
+    return (time.perf_counter() - started) / len(texts) * 1e6
+
+
+async def route_throughput(counter: TokenCounter, requests: int, *, unique: bool = True) -> float:
+    rules = DecisionRules(token_counter=counter)
+    providers = {key: StubClient(key, config['model']) for key, config in rules.catalog.items()}
+    engine = RouterEngine(providers, rules=rules)
+    queries = [CORPUS[i % len(CORPUS)] for i in range(requests)]
+    if unique:
+        queries = [f'{query} (ticket {i})' for i, query in enumerate(queries)]
+    payloads = [
+        RouteRequest(
+            user_query=queries[i],
+            importance_precision=(i % 10) / 10,
+            importance_latency=((i * 3) % 10) / 10,
+            importance_cost=((i * 7) % 10) / 10,
+        )
+        for i in range(requests)
+    ]
+    started = time.perf_counter()
+    for payload in payloads:
+        await engine.route(payload)
+    return requests / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=5_000)
+    parser.add_argument('--repeated', action='store_true', help='cycle the corpus (LRU hits)')
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    counter = TokenCounter()
+    print('tokens (tokenizer vs heuristic):')
+    for text in CORPUS:
+        print(f'  {counter.count(text, "gpt-4o-mini"):5d} vs {len(text.split()) * 4:5d}  {text[:50]!r}')
+
+    unique = [f'{text} #{i}' for i, text in enumerate(CORPUS * 2000)]
+    cold = time_counts(TokenCounter(), unique)
+    warm = time_counts(counter, list(CORPUS) * 2000)
+    print(f'count cold: {cold:6.2f} us/query  cached: {warm:6.2f} us/query')
+
+    # Swap which strategy runs first every round: the same strategy measures several
+    # percent apart depending on its slot alone. Noise only ever slows a run down, so
+    # the best round is the steadier comparison; the median is shown alongside.
+    unique = not args.repeated
+    runs: dict[type[TokenCounter], list[float]] = {WordHeuristicCounter: [], TokenCounter: []}
+    for round_index in range(args.rounds):
+        order = list(runs) if round_index % 2 == 0 else list(runs)[::-1]
+        for counter_type in order:
+            gc.collect()
+            runs[counter_type].append(
+                asyncio.run(route_throughput(counter_type(), args.requests, unique=unique))
+            )
+    print(f'route throughput ({"unique" if unique else "repeated"} prompts, {args.rounds} rounds):')
+    for label, pick in (('best', max), ('median', statistics.median)):
+        baseline = pick(runs[WordHeuristicCounter])
+        tokenized = pick(runs[TokenCounter])
+        print(
+            f'  {label:6s} heuristic {baseline:8.0f} req/s  tokenizer {tokenized:8.0f} req/s '
+            f'({(tokenized / baseline - 1) * 100:+.1f}%)'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+import asyncio
+
+from app.models.schemas import RouterRequest
+from app.providers.batching import BatchingClient
+from app.providers.openai_client import OpenAIClient
+
+
+def test_batched_calls_resolve_in_order() -> None:
+    async def run() -> list[str]:
+        client = BatchingClient(OpenAIClient(), window_ms=1, max_batch_size=8)
+        payloads = [RouterRequest(query=f'pregunta {i}') for i in range(5)]
+        outputs = await asyncio.gather(*(client.generate(payload) for payload in payloads))
+        assert client.stats.batches == 1
+        return list(outputs)
+
+    outputs = asyncio.run(run())
+    assert [output.endswith(f'pregunta {i}') for i, output in enumerate(outputs)] == [True] * 5
+
+
+def test_cancelled_dispatch_cancels_waiters() -> None:
+    async def run() -> None:
+        client = BatchingClient(OpenAIClient(), window_ms=1, max_batch_size=2)
+        waiters = [
+            asyncio.ensure_future(client.generate(RouterRequest(query=f'q{i}'))) for i in range(2)
+        ]
+        await asyncio.sleep(0.01)
+        for task in list(client._in_flight):
+            task.cancel()
+        results = await asyncio.wait_for(
+            asyncio.gather(*waiters, return_exceptions=True), timeout=1
+        )
+        assert all(isinstance(result, asyncio.CancelledError) for result in results)
+
+    asyncio.run(run())
@@ -0,0 +1,61 @@
+from app.core.circuit_breaker import BreakerConfig, CircuitBreakerRegistry
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _registry(clock: FakeClock) -> CircuitBreakerRegistry:
+    config = BreakerConfig(window_size=4, min_calls=2, open_seconds=30, probe_interval_seconds=5)
+    return CircuitBreakerRegistry(config, clock=clock)
+
+
+def _state(registry: CircuitBreakerRegistry) -> str:
+    return registry.to_dict()['breakers']['openai:gpt-4o-mini']['state']
+
+
+def test_late_call_from_closed_state_does_not_close_half_open_breaker() -> None:
+    clock = FakeClock()
+    registry = _registry(clock)
+    slow = registry.acquire('openai', 'gpt-4o-mini')
+    for _ in range(2):
+        registry.record_failure(registry.acquire('openai', 'gpt-4o-mini'))
+    assert _state(registry) == 'open'
+
+    clock.now = 31
+    probe = registry.acquire('openai', 'gpt-4o-mini')
+    assert probe is not None and probe.probe
+    assert _state(registry) == 'half_open'
+
+    # The call admitted before the breaker opened finishes now.
+    registry.record_success(slow)
+    assert _state(registry) == 'half_open'
+    clock.now = 40
+    assert registry.acquire('openai', 'gpt-4o-mini') is None
+
+    registry.record_success(probe)
+    assert _state(registry) == 'closed'
+
+
+def test_cancelled_probe_frees_its_slot_once() -> None:
+    clock = FakeClock()
+    registry = _registry(clock)
+    for _ in range(2):
+        registry.record_failure(registry.acquire('openai', 'gpt-4o-mini'))
+    clock.now = 31
+    probe = registry.acquire('openai', 'gpt-4o-mini')
+    registry.release(probe)
+    registry.release(probe)
+    clock.now = 37
+    slow = registry.acquire('openai', 'gpt-4o-mini')
+    assert slow is not None and slow.probe
+
+    registry.record_failure(slow)
+    assert _state(registry) == 'open'
+    # A stale probe ticket from the previous half-open episode changes nothing.
+    registry.record_success(probe)
+    assert _state(registry) == 'open'
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+
+from app.metrics.live_feed import MetricsFeed
+from app.metrics.metrics_service import MetricRecord, MetricsService
+from app.metrics.storage import MetricsStorage
+
+
+def _record(record_id: int | None = None) -> MetricRecord:
+    return MetricRecord(
+        provider='openai',
+        model='gpt-4o-mini',
+        latency_ms=100,
+        cost_usd=0.001,
+        score=0.8,
+        rationale='test',
+        created_at=datetime.now(timezone.utc),
+        id=record_id,
+    )
+
+
+def _ids_until_caught_up(feed: MetricsFeed, last_event_id: int, last_id: int) -> list[object]:
+    async def run() -> list[object]:
+        received: list[object] = []
+        stream = feed.stream(last_event_id)
+        async for frame in stream:
+            event = frame.split('event: ', 1)[1].split('\n', 1)[0]
+            if event == 'reset':
+                received.append('reset')
+                break
+            if event == 'metrics':
+                rows = json.loads(frame.split('data: ', 1)[1])
+                received.extend(row[0] for row in rows)
+                if received[-1] == last_id:
+                    break
+        await stream.aclose()
+        return received
+
+    return asyncio.run(run())
+
+
+def test_resume_older_than_ring_backfills_from_storage(tmp_path) -> None:
+    storage = MetricsStorage(tmp_path / 'metrics.sqlite')
+    for _ in range(153):
+        storage.save(_record())
+    feed = MetricsFeed(storage=storage, batch_interval_s=0)
+    feed.seed(storage.fetch_page(after_id=150))
+
+    assert _ids_until_caught_up(feed, 100, 153) == list(range(101, 154))
+
+
+def test_resume_after_restart_with_empty_ring(tmp_path) -> None:
+    storage = MetricsStorage(tmp_path / 'metrics.sqlite')
+    for _ in range(5):
+        storage.save(_record())
+    feed = MetricsFeed(storage=storage, batch_interval_s=0)
+
+    assert _ids_until_caught_up(feed, 2, 5) == [3, 4, 5]
+
+
+def test_resume_older_than_ring_without_storage_resets() -> None:
+    feed = MetricsFeed(batch_interval_s=0)
+    for record_id in (151, 152, 153):
+        feed.publish(_record(record_id))
+
+    assert _ids_until_caught_up(feed, 100, 153) == ['reset']
+
+
+def test_warm_up_seeds_the_ring_on_the_event_loop(tmp_path) -> None:
+    storage = MetricsStorage(tmp_path / 'metrics.sqlite')
+    for _ in range(3):
+        storage.save(_record())
+    service = MetricsService(storage)
+    seeded_on: list[int] = []
+    seed = service.feed.seed
+    service.feed.seed = lambda records: (seeded_on.append(threading.get_ident()), seed(records))
+
+    async def run() -> int:
+        await service.warm_up()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+
+    assert seeded_on == [loop_thread]
+    assert [record.id for record in service.feed._ring] == [1, 2, 3]
+    assert service.ready
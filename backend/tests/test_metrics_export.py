@@ -0,0 +1,81 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+from app.metrics.export import export_metrics
+from app.metrics.metrics_service import MetricRecord
+from app.metrics.storage import MetricsStorage
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _storage(tmp_path, count: int) -> MetricsStorage:
+    storage = MetricsStorage(tmp_path / 'metrics.sqlite')
+    for offset in range(count):
+        storage.save(
+            MetricRecord(
+                provider='openai',
+                model='gpt-4o-mini',
+                latency_ms=100,
+                cost_usd=0.001,
+                score=0.8,
+                rationale='test',
+                created_at=BASE + timedelta(seconds=offset),
+            )
+        )
+    return storage
+
+
+def test_time_window_export_is_exact_across_chunks(tmp_path) -> None:
+    storage = _storage(tmp_path, 50)
+
+    async def run() -> list[int]:
+        chunks = [
+            chunk
+            async for chunk in export_metrics(
+                storage,
+                since=BASE + timedelta(seconds=10),
+                until=BASE + timedelta(seconds=37),
+                chunk_size=4,
+            )
+        ]
+        return [json.loads(line)['id'] for line in ''.join(chunks).splitlines()]
+
+    assert asyncio.run(run()) == list(range(11, 38))
+
+
+def test_time_bounded_page_walks_the_rowid(tmp_path) -> None:
+    storage = _storage(tmp_path, 1)
+    params: list[object] = [0]
+    clauses = storage._time_clauses(BASE, BASE + timedelta(days=1), params)
+    with storage._connect() as connection:
+        plan = connection.execute(
+            f"EXPLAIN QUERY PLAN SELECT id FROM metrics WHERE id > ? AND {' AND '.join(clauses)} "
+            'ORDER BY id LIMIT 10',
+            params,
+        ).fetchall()
+
+    details = ' '.join(row[-1] for row in plan)
+    assert 'TEMP B-TREE' not in details
+    assert 'idx_metrics_created_at' not in details
+
+
+def test_time_bounded_page_starts_at_the_window(tmp_path, monkeypatch) -> None:
+    storage = _storage(tmp_path, 50)
+    statements: list[str] = []
+    connect = storage._connect
+
+    def traced_connect():
+        connection = connect()
+        connection.set_trace_callback(statements.append)
+        return connection
+
+    monkeypatch.setattr(storage, '_connect', traced_connect)
+    records = storage.fetch_page(since=BASE + timedelta(seconds=45), limit=10)
+
+    assert [record.id for record in records] == [46, 47, 48, 49, 50]
+    page_query = next(sql for sql in statements if 'ORDER BY id' in sql)
+    assert 'id > 45' in page_query and 'id <= 50' in page_query
+    with connect() as connection:
+        plan = ' '.join(row[-1] for row in connection.execute('EXPLAIN QUERY PLAN ' + page_query))
+    assert 'INTEGER PRIMARY KEY' in plan and 'TEMP B-TREE' not in plan
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from app.core.decision_rules import DecisionRules
+from app.core.prompt_compactor import PromptCompactor
+from app.core.router_engine import RouterEngine
+from app.models.schemas import RouteRequest
+from app.providers.stub_client import StubClient
+
+
+def _engine() -> RouterEngine:
+    rules = DecisionRules()
+    providers = {key: StubClient(key, config['model']) for key, config in rules.catalog.items()}
+    return RouterEngine(providers, rules=rules, compactor=PromptCompactor(rules.token_counter))
+
+
+@pytest.mark.parametrize(
+    'query',
+    [
+        # Far past the free-tier budget: truncated, and past the point where the
+        # request-level cost estimate stops growing with the prompt.
+        ' '.join(f'Registro {i}: el servicio {i % 7} respondio lento.' for i in range(900)),
+        'Hola a todos,\nResume los cambios del ultimo despliegue.',
+    ],
+)
+def test_saved_input_tokens_always_save_cost(query: str) -> None:
+    engine = _engine()
+    payload = RouteRequest(
+        user_query=query,
+        importance_precision=0.2,
+        importance_latency=0.2,
+        importance_cost=0.9,
+    )
+
+    result = asyncio.run(engine.route(payload))
+
+    assert result.input_tokens_saved > 0
+    assert result.cost_saved_usd > 0
+    assert engine.compactor.stats.to_dict()['cost_saved_usd'] > 0
@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+from app.core.decision_rules import DecisionRules
+from app.core.rate_limiter import RateLimitExceeded, TenantLimits, TenantRateLimiter
+from app.core.router_engine import RouterEngine
+from app.models.schemas import RouteRequest, RouterRequest
+from app.providers.stub_client import StubClient
+
+ANALYTICAL = 'Analiza la estrategia de precios de la competencia y compara con la nuestra'
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FailingClient(StubClient):
+    async def generate(self, payload: RouterRequest, *, model: str | None = None) -> str:
+        raise RuntimeError('provider down')
+
+
+def _engine(limiter: TenantRateLimiter, *, client=StubClient, response_cache=None) -> RouterEngine:
+    rules = DecisionRules()
+    providers = {key: client(key, config['model']) for key, config in rules.catalog.items()}
+    return RouterEngine(
+        providers, rules=rules, rate_limiter=limiter, response_cache=response_cache
+    )
+
+
+def _request(query: str = ANALYTICAL) -> RouteRequest:
+    return RouteRequest(
+        user_query=query, importance_precision=0.5, importance_latency=0.5, importance_cost=0.5
+    )
+
+
+def _usd_left(limiter: TenantRateLimiter, tenant: str = 'anonymous') -> float:
+    return limiter._buckets[tenant].usd_tokens
+
+
+def test_request_bucket_refills_at_the_configured_rate() -> None:
+    clock = FakeClock()
+    limiter = TenantRateLimiter(TenantLimits(requests_per_second=2, request_burst=2), clock=clock)
+    limiter.acquire_request('t1')
+    limiter.acquire_request('t1')
+
+    with pytest.raises(RateLimitExceeded) as exc:
+        limiter.acquire_request('t1')
+    assert exc.value.retry_after_s == pytest.approx(0.5)
+
+    clock.now = 0.25
+    with pytest.raises(RateLimitExceeded) as exc:
+        limiter.acquire_request('t1')
+    assert exc.value.retry_after_s == pytest.approx(0.25)
+
+    clock.now = 0.5
+    limiter.acquire_request('t1')
+    # Other tenants have their own bucket.
+    limiter.acquire_request('t2')
+
+
+def test_success_is_charged_the_realized_cost() -> None:
+    limiter = TenantRateLimiter(TenantLimits(usd_per_minute=1.0), clock=FakeClock())
+    result = asyncio.run(_engine(limiter).route(_request()))
+
+    assert _usd_left(limiter) == pytest.approx(1.0 - result.cost_usd)
+
+
+def test_failed_call_refunds_the_reservation() -> None:
+    limiter = TenantRateLimiter(TenantLimits(usd_per_minute=1.0), clock=FakeClock())
+    with pytest.raises(RuntimeError):
+        asyncio.run(_engine(limiter, client=FailingClient).route(_request()))
+
+    assert _usd_left(limiter) == pytest.approx(1.0)
+
+
+def test_cache_hit_refunds_the_reservation() -> None:
+    pytest.importorskip('numpy')
+    from app.core.response_cache import SemanticResponseCache
+
+    limiter = TenantRateLimiter(TenantLimits(usd_per_minute=1.0), clock=FakeClock())
+    engine = _engine(limiter, response_cache=SemanticResponseCache())
+    first = asyncio.run(engine.route(_request('hola, que hora es en Bogota ahora mismo?')))
+    second = asyncio.run(engine.route(_request('hola, que hora es en Bogota ahora mismo?')))
+
+    assert second.cache_hit
+    assert _usd_left(limiter) == pytest.approx(1.0 - first.cost_usd)
+
+
+def test_budget_downgrades_to_the_cheaper_provider_then_rejects() -> None:
+    clock = FakeClock()
+    # Enough for GPT-4o-mini (~0.0015) but not for Gemini 2.5 Pro (~0.0028).
+    limiter = TenantRateLimiter(TenantLimits(usd_per_minute=0.002), clock=clock)
+    engine = _engine(limiter)
+
+    preferred = engine.rules.select(engine._to_internal_payload(_request()))
+    assert preferred.provider == 'gemini_pro'
+
+    downgraded = asyncio.run(engine.route(_request()))
+    assert downgraded.provider == 'openai'
+
+    with pytest.raises(RateLimitExceeded) as exc:
+        asyncio.run(engine.route(_request()))
+    assert exc.value.reason == 'USD/min'
+    missing = preferred.estimated_cost_usd - _usd_left(limiter)
+    assert exc.value.retry_after_s == pytest.approx(missing / limiter.limits.usd_per_second)
+
+
+def test_only_idle_full_buckets_are_evicted() -> None:
+    clock = FakeClock()
+    limiter = TenantRateLimiter(TenantLimits(), idle_seconds=60, clock=clock)
+    limiter.acquire_request('t1')
+    limiter.try_charge('t2', 0.25)
+    # The call cost twice its estimate, leaving a debt that takes two minutes to repay.
+    limiter.reconcile('t2', 0.25, 0.5)
+
+    clock.now = 61
+    limiter.acquire_request('t3')
+    # t1 refilled and went idle; t2 is idle as well but still repaying its debt.
+    assert list(limiter._buckets) == ['t2', 't3']
+
+
+def test_full_table_refuses_new_tenants_instead_of_resetting_active_ones() -> None:
+    clock = FakeClock()
+    limiter = TenantRateLimiter(TenantLimits(), max_tenants=2, clock=clock)
+    limiter.try_charge('t1', 0.25)
+    limiter.try_charge('t2', 0.25)
+
+    with pytest.raises(RateLimitExceeded) as exc:
+        limiter.acquire_request('t3')
+    assert exc.value.reason == 'tenants'
+    assert exc.value.retry_after_s == pytest.approx(60)
+    assert list(limiter._buckets) == ['t1', 't2']
+
+    clock.now = 60
+    limiter.acquire_request('t3')
+    assert list(limiter._buckets) == ['t2', 't3']
@@ -0,0 +1,76 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+from app.core.response_cache import SemanticResponseCache  # noqa: E402
+
+DELIVERY = (
+    'Write a short, friendly message to the customer explaining that their replacement '
+    'order for the blue ceramic coffee mugs has shipped and arrives on {day} morning, '
+    'and remind them to keep the original packaging in case they need to return anything.'
+)
+CONVERSION = (
+    'Convert {amount} USD to EUR using the latest exchange rate and explain in two '
+    'sentences how card fees and the bank spread change the final amount received.'
+)
+DEPLOY = (
+    'Should I {verb} deploy the new billing service to production on Friday afternoon '
+    'given that the on-call engineer is away and the database migration is irreversible?'
+)
+
+
+def _store_then_lookup(stored: str, asked: str, *, provider: str = 'openai', tenants=('t1', 't1')):
+    cache = SemanticResponseCache()
+    model = 'gpt-4o-mini'
+    cache.store(cache.prepare(stored, tenants[0]), provider, model, 'cached', latency_ms=1, cost_usd=1)
+    query = cache.prepare(asked, tenants[1])
+    return cache.lookup(query, provider, model), cache
+
+
+@pytest.mark.parametrize(
+    ('stored', 'asked'),
+    [
+        (DELIVERY.format(day='Tuesday'), DELIVERY.format(day='Thursday')),
+        (CONVERSION.format(amount='150'), CONVERSION.format(amount='950')),
+        (DEPLOY.format(verb='').replace('  ', ' '), DEPLOY.format(verb='not')),
+    ],
+)
+@pytest.mark.parametrize('provider', ['openai', 'gemini_pro'])
+def test_different_meaning_is_not_served(stored: str, asked: str, provider: str) -> None:
+    hit, cache = _store_then_lookup(stored, asked, provider=provider)
+    # The pairs are close enough to pass the cosine threshold on their own.
+    similarity = float(cache.embed(stored) @ cache.embed(asked))
+    assert similarity >= cache.thresholds['openai']
+    assert hit is None
+
+
+def test_formatting_variants_still_hit() -> None:
+    stored = DELIVERY.format(day='Tuesday')
+    asked = '  ' + stored.upper().replace(',', '').replace('.', '!') + '  '
+    hit, _ = _store_then_lookup(stored, asked)
+    assert hit is not None and hit.output_text == 'cached'
+
+
+def test_contracted_negation_is_a_negation() -> None:
+    hit, _ = _store_then_lookup(
+        DEPLOY.format(verb='not'), DEPLOY.format(verb='').replace('Should I ', "Shouldn't I ")
+    )
+    assert hit is not None
+
+
+def test_entries_are_scoped_to_the_tenant() -> None:
+    stored = CONVERSION.format(amount='150')
+    assert _store_then_lookup(stored, stored, tenants=('t1', 't2'))[0] is None
+    assert _store_then_lookup(stored, stored, tenants=('t1', 't1'))[0] is not None
+
+
+def test_swapped_word_order_is_not_served() -> None:
+    transfer = (
+        'Transfer 500 USD from account {source} to account {target} and confirm the new '
+        'balance of both accounts once the bank has processed the payment today.'
+    )
+    stored = transfer.format(source='A', target='B')
+    asked = transfer.format(source='B', target='A')
+    hit, cache = _store_then_lookup(stored, asked)
+    assert float(cache.embed(stored) @ cache.embed(asked)) >= cache.thresholds['openai']
+    assert hit is None
@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+from app.diagnostics.sampling_profiler import SamplingProfiler
+
+
+def _spin(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def profiled_request() -> None:
+    for _ in range(20):
+        _spin(0.002)
+        await asyncio.sleep(0.002)
+
+
+async def other_request() -> None:
+    for _ in range(20):
+        _spin(0.002)
+        await asyncio.sleep(0.001)
+
+
+def test_task_scoped_profile_excludes_other_requests_and_threads() -> None:
+    async def run() -> str:
+        profiler: SamplingProfiler | None = None
+
+        async def target() -> None:
+            nonlocal profiler
+            profiler = SamplingProfiler(interval_s=0.0005, task=asyncio.current_task())
+            profiler.start()
+            await profiled_request()
+
+        worker = asyncio.create_task(asyncio.to_thread(_spin, 0.05))
+        await asyncio.gather(target(), other_request(), worker)
+        profiler.stop()
+        return profiler.collapsed()
+
+    collapsed = asyncio.run(run())
+
+    # Match frame labels, not substrings of this test's own name.
+    assert ':profiled_request' in collapsed
+    assert ':other_request' not in collapsed
+    assert 'asyncio_' not in collapsed and 'ThreadPool' not in collapsed
+    assert '<awaiting>' in collapsed
@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+from app.core.decision_rules import DecisionRules  # noqa: E402
+from app.core.semantic_router import SemanticRouter, SemanticVote  # noqa: E402
+from app.models.schemas import RouterRequest  # noqa: E402
+
+
+def _select(query: str, vote: SemanticVote | None) -> str:
+    return DecisionRules().select(RouterRequest(query=query), semantic_vote=vote).provider
+
+
+@pytest.mark.parametrize(
+    'query',
+    [
+        'crea una funcion en python que ordene una lista',
+        'make a plan for the product launch',
+        'haz una lista de tareas para el lunes',
+        'create a weather app backend in go',
+        'write a python function that sorts a list',
+        'plan the roadmap for next quarter with risks',
+    ],
+)
+def test_loose_semantic_matches_do_not_change_text_routing(query: str) -> None:
+    router = SemanticRouter.from_path_or_defaults(None)
+
+    assert _select(query, router.vote(query)) == _select(query, None)
+
+
+def test_image_vote_without_visual_cues_keeps_a_text_model() -> None:
+    vote = SemanticVote(provider='gemini_flash_image', confidence=1.0, similarity=0.95)
+
+    assert _select('resume este parrafo en una linea', vote) != 'gemini_flash_image'
+
+
+def test_close_semantic_matches_still_route() -> None:
+    router = SemanticRouter.from_path_or_defaults(None)
+    # No analytical keyword: only the semantic vote moves it off GPT-4o-mini.
+    query = 'disena una arquitectura escalable de pagos con sus tradeoffs'
+
+    assert _select(query, None) == 'openai'
+    assert _select(query, router.vote(query)) == 'gemini_pro'
+    assert _select('genera una imagen de un perro astronauta', None) == 'gemini_flash_image'
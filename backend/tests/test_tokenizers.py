@@ -0,0 +1,83 @@
+import asyncio
+
+from app.core.decision_rules import DecisionRules
+from app.core.router_engine import RouterEngine
+from app.models.schemas import RouteRequest
+from app.providers.stub_client import StubClient
+from app.providers.tokenizers import ApproxBpeTokenizer, TokenCounter
+
+
+def test_approximation_charges_long_and_non_ascii_words_more() -> None:
+    tokenizer = ApproxBpeTokenizer(chars_per_token=4.0)
+
+    assert tokenizer.count('') == 1
+    # About one token per short word.
+    assert 3 <= tokenizer.count('hola que tal') <= 4
+    assert tokenizer.count('internacionalizacion') > tokenizer.count('hola')
+    assert tokenizer.count('señalización ' * 10) > tokenizer.count('senalizacion ' * 10)
+
+
+class SpyTokenizer(ApproxBpeTokenizer):
+    def __init__(self, *, cacheable: bool = False) -> None:
+        super().__init__()
+        self.cacheable = cacheable
+        self.calls = 0
+
+    def count(self, text: str) -> int:
+        self.calls += 1
+        return super().count(text)
+
+
+def test_route_counts_the_prompt_once() -> None:
+    gpt, gemini = SpyTokenizer(), SpyTokenizer()
+    counter = TokenCounter({'gpt': lambda: gpt, 'gemini': lambda: gemini})
+    rules = DecisionRules(token_counter=counter)
+    providers = {key: StubClient(key, config['model']) for key, config in rules.catalog.items()}
+    engine = RouterEngine(providers, rules=rules)
+    payload = RouteRequest(
+        user_query='Compara dos estrategias de cache para una API con mucho trafico.',
+        importance_precision=0.5,
+        importance_latency=0.5,
+        importance_cost=0.5,
+    )
+
+    asyncio.run(engine.route(payload))
+
+    assert (gpt.calls, gemini.calls) == (1, 0)
+
+
+def test_only_cacheable_tokenizers_go_through_the_cache() -> None:
+    exact, approx = SpyTokenizer(cacheable=True), SpyTokenizer()
+    counter = TokenCounter({'gpt': lambda: exact, 'gemini': lambda: approx})
+    for _ in range(3):
+        counter.count('hola que tal', 'gpt-4o-mini')
+        counter.count('hola que tal', 'gemini-2.5-pro')
+
+    assert (exact.calls, counter.misses, counter.hits) == (1, 1, 2)
+    assert approx.calls == 3
+
+
+def test_other_families_are_scaled_from_the_default_count() -> None:
+    counter = TokenCounter(ratios={'gpt': 1.0, 'gemini': 1.5})
+    text = 'Resume el siguiente contrato de servicios en cinco puntos.'
+
+    counts = counter.count_families(text, ['gpt-4o-mini', 'gemini-2.5-pro'])
+
+    assert counts == {'gpt': counter.count(text), 'gemini': round(counter.count(text) * 1.5)}
+
+
+def test_load_builds_every_family_tokenizer() -> None:
+    built: list[str] = []
+
+    def factory(family: str):
+        def build() -> ApproxBpeTokenizer:
+            built.append(family)
+            return ApproxBpeTokenizer()
+
+        return build
+
+    counter = TokenCounter({'gpt': factory('gpt'), 'gemini': factory('gemini')})
+    counter.load()
+    counter.count('hola', 'gemini-2.5-pro')
+
+    assert built == ['gpt', 'gemini']
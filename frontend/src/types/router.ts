@@ -12,6 +12,9 @@ export type RouteResponse = {
   cost_usd: number;
   quality_score: number;
   routing_explanation: string;
+  cache_hit?: boolean;
+  input_tokens_saved?: number;
+  cost_saved_usd?: number;
   timestamp: string;
 };
 